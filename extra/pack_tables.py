@@ -0,0 +1,44 @@
+import os
+import sys
+
+# Packs the constant tables of a stdlib module, such as the generators.py of a
+# Pedersen hash or the constants.py of Poseidon, into one {name}.bin file per
+# table next to it. The values are stored in row-major order as little-endian
+# 32-byte integers. Python loads the tables from these files, while the
+# compiler reads them from the module, so both must be regenerated together.
+
+VALUE_SIZE = 32
+
+
+class _Array:
+    def __class_getitem__(cls, item):
+        return None
+
+
+def _flatten(value):
+    if isinstance(value, list):
+        return [item for element in value for item in _flatten(element)]
+    return [value]
+
+
+def pack_tables(module_path):
+    with open(module_path, 'r') as file:
+        # The imports are replaced by plain integers for the field elements
+        source = ''.join(line for line in file if 'zk_ignore' not in line)
+    namespace = {'field': int, 'Array': _Array}
+    exec(source, namespace)
+
+    folder = os.path.dirname(module_path)
+    for name, table in namespace.items():
+        if not isinstance(table, list):
+            continue
+        with open(os.path.join(folder, '{}.bin'.format(name)), 'wb') as file:
+            for value in _flatten(table):
+                file.write(value.to_bytes(VALUE_SIZE, 'little'))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python pack_tables.py <path to the module>")
+        sys.exit(1)
+    pack_tables(sys.argv[1])
@@ -1,191 +1,670 @@
-use std::{path::Path, fs::File, io::{Write, Read}};
+use std::{collections::HashMap, path::Path, fs::File, io::Read, sync::{Arc, Mutex}};
 use bincode;
 use pyo3::{prelude::*, exceptions, types::PyBytes};
-use zkinterface::{Reader, consumers::stats::Stats, Workspace};
+use rayon::prelude::*;
+use rug::{Integer, integer::Order};
+use zkinterface::{Reader, consumers::reader::{Constraint, Term}};
+use zkinterface_bellman::bellman::groth16::{Parameters, PreparedVerifyingKey, Proof, VerifyingKey as Groth16VerifyingKey, prepare_verifying_key};
+use zkinterface_bellman::bls12_381::Bls12;
+use zkinterface_bellman::zkif_backend;
+use zkinterface_bulletproofs::{BulletproofGens, PedersenGens};
 use zkinterface_bulletproofs::r1cs::R1CSProof;
 
-use crate::utilities::create_folder;
+use crate::utilities::{create_folder, push_zkif_messages, write_atomic, Buffer, BufferSource};
 
 
 #[pyfunction]
 #[pyo3(signature = (circuit, constraints, f_name, id=0, module_name=String::from("__main___"), backend=None))]
 fn setup(
-    _py: Python,
-    circuit: &PyBytes,
-    constraints: &PyBytes,
+    py: Python,
+    circuit: Buffer,
+    constraints: Buffer,
     f_name: String,
     id: usize,
     module_name: String,
     backend: Option<String>,
 ) -> PyResult<()> {
-    let mut reader = Reader::new();
-
-    match reader.push_message(circuit.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
+    let messages = [circuit.as_source(), constraints.as_source()];
 
-    match reader.push_message(constraints.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
+    py.allow_threads(|| {
+        let reader = reader_from_messages(&messages)?;
 
-    let workspace = Path::new(".").join(format!("cache_id_{}", id));
-    let zkp_key_workspace = create_folder(&workspace, "zkp_params_and_proofs");
-    let key_name = format!("{}_{}_key.dat", module_name, f_name);
+        let workspace = Path::new(".").join(format!("cache_id_{}", id));
+        let zkp_key_workspace = create_folder(&workspace, "zkp_params_and_proofs");
+        let key_name = format!("{}_{}_key.dat", module_name, f_name);
+        let vk_name = format!("{}_{}_vk.dat", module_name, f_name);
 
-    match backend {
-        Some(s) => match s.as_str() {
-            "groth16" => match zkinterface_bellman::zkif_backend::setup(&reader, &zkp_key_workspace, &key_name) {
-                    Ok(_) => Ok(()),
-                    Err(err) => Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    let params = zkif_backend::generate_parameters(&reader).map_err(runtime_error)?;
+                    let mut params_ser = Vec::new();
+                    params.write(&mut params_ser)?;
+                    // The verifying key is also stored on its own, for verifiers to load only that
+                    let mut vk_ser = Vec::new();
+                    params.vk.write(&mut vk_ser)?;
+                    // Renamed into place, so that concurrent provers never read a partial key
+                    write_atomic(&zkp_key_workspace.join(vk_name), &vk_ser)?;
+                    write_atomic(&zkp_key_workspace.join(key_name), &params_ser)?;
+                    Ok(())
+                }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
             }
-            e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for trusted setup.")))
         }
-        None => Err(exceptions::PyValueError::new_err(format!("No backend provided for trusted setup.")))
-    }
+    })
 }
 
 #[pyfunction]
-#[pyo3(signature = (circuit, witness, constraints, f_name, id=0, module_name=String::from("__main___"), backend=None))]
+#[pyo3(signature = (circuit, witness, constraints, f_name, id=0, module_name=String::from("__main___"), backend=None, trusted=false))]
 fn prove(
-    _py: Python,
-    circuit: &PyBytes,
-    witness: &PyBytes,
-    constraints: &PyBytes,
+    py: Python,
+    circuit: Buffer,
+    witness: Buffer,
+    constraints: Buffer,
     f_name: String,
     id: usize,
     module_name: String,
     backend: Option<String>,
+    trusted: bool,
 ) -> PyResult<()> {
-    let mut reader = Reader::new();
+    let messages = [circuit.as_source(), witness.as_source(), constraints.as_source()];
 
-    match reader.push_message(circuit.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-
-    match reader.push_message(witness.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-
-    match reader.push_message(constraints.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-
-    let workspace = Path::new(".").join(format!("cache_id_{}", id));
-    let zkp_key_workspace = create_folder(&workspace, "zkp_params_and_proofs");
-    let zkif_workspace = workspace.join(format!("zkif_export"));
-    let key_name = format!("{}_{}_key.dat", module_name, f_name);
-    let proof_name = format!("{}_{}_proof.dat", module_name, f_name);
-
-    // Unfortunately zkinterface consumers only read from files or stdin, so we define the cached zkif file paths.
-    let circuit_file = zkif_workspace.join(format!("header_{}_{}.zkif", module_name, f_name));
-    let witness_file = zkif_workspace.join(format!("witness_{}_{}.zkif", module_name, f_name));
-    let constraints_file = zkif_workspace.join(format!("constraints_{}_{}.zkif", module_name, f_name));
-
-    let mut stats = Stats::default();
-    let ws = match Workspace::from_dirs_and_files(&[circuit_file, witness_file, constraints_file]) {
-        Ok(ws) => ws,
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-    stats.ingest_workspace(&ws);
-
-    match backend {
-        Some(s) => match s.as_str() {
-            "groth16" => match zkinterface_bellman::zkif_backend::prove(&reader, &zkp_key_workspace, &key_name, &proof_name) {
-                Ok(_) => Ok(()),
-                Err(err) => Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-            }
-            "bulletproofs" => {
-                let generators_count = (stats.multiplications.next_power_of_two()*2) as usize;
-                let proof_path = zkp_key_workspace.join(proof_name);
-                let proof = match zkinterface_bulletproofs::r1cs::zkinterface_backend::prove(&reader, generators_count) {
-                    Ok(pf) => pf,
-                    Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-                };
-                let proof_ser = match bincode::serialize(&proof) {
-                    Ok(pf) => pf,
-                    Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-                };
-                File::create(proof_path)?.write_all(&proof_ser)?;
-                Ok(())
+    py.allow_threads(|| {
+        let reader = reader_from_messages(&messages)?;
+
+        let workspace = Path::new(".").join(format!("cache_id_{}", id));
+        let zkp_key_workspace = create_folder(&workspace, "zkp_params_and_proofs");
+        let key_name = format!("{}_{}_key.dat", module_name, f_name);
+        let proof_name = format!("{}_{}_proof.dat", module_name, f_name);
+
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    let params = BufferSource::Path(zkp_key_workspace.join(key_name)).read_parameters(trusted)?;
+                    let proof = zkif_backend::create_proof(&reader, &params).map_err(runtime_error)?;
+                    let mut proof_ser = Vec::new();
+                    proof.write(&mut proof_ser)?;
+                    write_atomic(&zkp_key_workspace.join(proof_name), &proof_ser)?;
+                    Ok(())
+                }
+                "bulletproofs" => {
+                    let generators_count = bulletproofs_generators_count(&reader, &reader);
+                    let proof_path = zkp_key_workspace.join(proof_name);
+                    let (bp_gens, pc_gens) = bulletproofs_generators(generators_count);
+                    let proof = match zkinterface_bulletproofs::r1cs::zkinterface_backend::prove_with_gens(&reader, &bp_gens, &pc_gens) {
+                        Ok(pf) => pf,
+                        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+                    };
+                    let proof_ser = match bincode::serialize(&proof) {
+                        Ok(pf) => pf,
+                        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+                    };
+                    write_atomic(&proof_path, &proof_ser)?;
+                    Ok(())
+                }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
             }
-            e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for proof.")))
         }
-        None => Err(exceptions::PyValueError::new_err(format!("No backend provided for proof.")))
-    }
+    })
 }
 
 #[pyfunction]
-#[pyo3(signature = (circuit, constraints, f_name, id=0, module_name=String::from("__main___"), backend=None))]
+#[pyo3(signature = (circuit, constraints, f_name, id=0, module_name=String::from("__main___"), backend=None, trusted=false))]
 fn verify(
-    _py: Python,
-    circuit: &PyBytes,
-    constraints: &PyBytes,
+    py: Python,
+    circuit: Buffer,
+    constraints: Buffer,
     f_name: String,
     id: usize,
     module_name: String,
     backend: Option<String>,
+    trusted: bool,
 ) -> PyResult<bool> {
+    let messages = [circuit.as_source(), constraints.as_source()];
+
+    py.allow_threads(|| {
+        let reader = reader_from_messages(&messages)?;
+
+        let workspace = Path::new(".").join(format!("cache_id_{}", id));
+        let zkp_key_workspace = create_folder(&workspace, "zkp_params_and_proofs");
+        let key_name = format!("{}_{}_key.dat", module_name, f_name);
+        let proof_name = format!("{}_{}_proof.dat", module_name, f_name);
+
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    // Only the verifying key at the beginning of the key file is read
+                    let vk = BufferSource::Path(zkp_key_workspace.join(key_name)).read_verifying_key(trusted)?;
+                    let pvk = prepare_verifying_key(&vk);
+                    let proof = Proof::<Bls12>::read(&std::fs::read(zkp_key_workspace.join(proof_name))?[..])?;
+                    zkif_backend::verify_proof_with_key(&reader, &pvk, &proof).map_err(runtime_error)
+                }
+                "bulletproofs" => {
+                    let generators_count = bulletproofs_generators_count(&reader, &reader);
+                    let proof_path = zkp_key_workspace.join(proof_name);
+
+                    // Load from file.
+                    let mut proof_ser = Vec::new();
+                    File::open(&proof_path)?.read_to_end(&mut proof_ser)?;
+                    let proof: R1CSProof = match bincode::deserialize(&proof_ser) {
+                        Ok(pf) => pf,
+                        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+                    };
+
+                    let (bp_gens, pc_gens) = bulletproofs_generators(generators_count);
+                    match zkinterface_bulletproofs::r1cs::zkinterface_backend::verify_with_gens(&reader, &proof, &bp_gens, &pc_gens) {
+                        Ok(res) => Ok(res),
+                        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+                    }
+                }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            }
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for proof.")))
+        }
+    })
+}
+
+fn runtime_error<E: std::fmt::Display>(err: E) -> PyErr {
+    exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))
+}
+
+impl<'a> BufferSource<'a> {
+    // Unless trusted, all points are checked to lie in the prime order subgroups
+    fn read_parameters(&self, trusted: bool) -> PyResult<Parameters<Bls12>> {
+        self.with_bytes(|crs| Ok(Parameters::<Bls12>::read(crs, !trusted)?))
+    }
+
+    // Either a verifying key or a CRS, which begins with its verifying key
+    fn read_verifying_key(&self, trusted: bool) -> PyResult<Groth16VerifyingKey<Bls12>> {
+        self.with_bytes(|vk| Ok(zkif_backend::read_verifying_key(vk, !trusted)?))
+    }
+}
+
+fn reader_from_messages(messages: &[BufferSource]) -> PyResult<Reader> {
     let mut reader = Reader::new();
+    for message in messages {
+        message.with_bytes(|bytes| push_zkif_messages(&mut reader, bytes).map_err(runtime_error))?;
+    }
+    Ok(reader)
+}
+
+// The Bulletproofs gadget allocates one gate per constraint, plus one for each private variable.
+// Both are counted on the messages already pushed into the readers, the header alone gives the
+// private variables, so that the prover and verifier agree on the count.
+fn bulletproofs_generators_count(circuit: &Reader, constraints: &Reader) -> usize {
+    let constraints = constraints.iter_constraints().count();
+    let private_vars = circuit.private_variables().map_or(0, |vars| vars.len());
+    (constraints + private_vars).next_power_of_two()
+}
+
+// Process-wide Bulletproofs generators, shared by all proofs and verifications. The cache only
+// grows: a request for more generators than cached replaces it with an extended copy, while the
+// proofs in flight keep using the copy they hold.
+static BULLETPROOFS_GENERATORS: Mutex<Option<(Arc<BulletproofGens>, PedersenGens)>> = Mutex::new(None);
+
+fn bulletproofs_generators(capacity: usize) -> (Arc<BulletproofGens>, PedersenGens) {
+    let mut cache = BULLETPROOFS_GENERATORS.lock().unwrap_or_else(|err| err.into_inner());
+    let (bp_gens, pc_gens) = cache.get_or_insert_with(|| (Arc::new(BulletproofGens::new(0, 1)), PedersenGens::default()));
+    if bp_gens.gens_capacity < capacity {
+        let mut grown = BulletproofGens::clone(bp_gens);
+        grown.increase_capacity(capacity.next_power_of_two());
+        *bp_gens = Arc::new(grown);
+    }
+    (Arc::clone(bp_gens), *pc_gens)
+}
+
+/// Precompute the Bulletproofs generators for circuits of up to `capacity` gates, so that the
+/// following proofs and verifications reuse them. Returns the capacity of the cache.
+#[pyfunction]
+fn warm_up_generators(py: Python, capacity: usize) -> usize {
+    py.allow_threads(|| bulletproofs_generators(capacity).0.gens_capacity)
+}
+
+// The functions below only hold the GIL to borrow their arguments and to build the result.
+// The messages are borrowed as byte slices or mapped from their files, which stay valid for
+// the duration of the call, and all parsing, setup, proving and verification runs in
+// `allow_threads`.
+
+#[pyfunction]
+#[pyo3(signature = (circuit, constraints, backend=None))]
+fn setup_in_memory<'py>(
+    py: Python<'py>,
+    circuit: Buffer,
+    constraints: Buffer,
+    backend: Option<String>,
+) -> PyResult<&'py PyBytes> {
+    let messages = [circuit.as_source(), constraints.as_source()];
+
+    let crs = py.allow_threads(|| -> PyResult<Vec<u8>> {
+        let reader = reader_from_messages(&messages)?;
+
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    let params = zkif_backend::generate_parameters(&reader).map_err(runtime_error)?;
+                    let mut crs = Vec::new();
+                    params.write(&mut crs)?;
+                    Ok(crs)
+                }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            }
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for trusted setup.")))
+        }
+    })?;
+    Ok(PyBytes::new(py, &crs))
+}
+
+#[pyfunction]
+#[pyo3(signature = (circuit, witness, constraints, crs=None, backend=None, trusted=false))]
+fn prove_in_memory<'py>(
+    py: Python<'py>,
+    circuit: Buffer,
+    witness: Buffer,
+    constraints: Buffer,
+    crs: Option<Buffer>,
+    backend: Option<String>,
+    trusted: bool,
+) -> PyResult<&'py PyBytes> {
+    let messages = [circuit.as_source(), witness.as_source(), constraints.as_source()];
+    let crs = crs.as_ref().map(Buffer::as_source);
+
+    let proof_ser = py.allow_threads(|| -> PyResult<Vec<u8>> {
+        let reader = reader_from_messages(&messages)?;
+
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    let crs = crs.ok_or_else(|| exceptions::PyValueError::new_err("No CRS provided for proof."))?;
+                    let params = crs.read_parameters(trusted)?;
+                    let proof = zkif_backend::create_proof(&reader, &params).map_err(runtime_error)?;
+                    let mut proof_ser = Vec::new();
+                    proof.write(&mut proof_ser)?;
+                    Ok(proof_ser)
+                }
+                "bulletproofs" => {
+                    let (bp_gens, pc_gens) = bulletproofs_generators(bulletproofs_generators_count(&reader, &reader));
+                    let proof = zkinterface_bulletproofs::r1cs::zkinterface_backend::prove_with_gens(&reader, &bp_gens, &pc_gens).map_err(runtime_error)?;
+                    bincode::serialize(&proof).map_err(runtime_error)
+                }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            }
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for proof.")))
+        }
+    })?;
+    Ok(PyBytes::new(py, &proof_ser))
+}
+
+#[pyfunction]
+#[pyo3(signature = (circuit, constraints, proof, crs=None, backend=None, trusted=false))]
+fn verify_in_memory(
+    py: Python,
+    circuit: Buffer,
+    constraints: Buffer,
+    proof: &PyBytes,
+    crs: Option<Buffer>,
+    backend: Option<String>,
+    trusted: bool,
+) -> PyResult<bool> {
+    let messages = [circuit.as_source(), constraints.as_source()];
+    let proof = proof.as_bytes();
+    let crs = crs.as_ref().map(Buffer::as_source);
+
+    py.allow_threads(|| {
+        let reader = reader_from_messages(&messages)?;
+
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    let crs = crs.ok_or_else(|| exceptions::PyValueError::new_err("No CRS provided for verification."))?;
+                    let pvk = prepare_verifying_key(&crs.read_verifying_key(trusted)?);
+                    let proof = Proof::<Bls12>::read(proof)?;
+                    zkif_backend::verify_proof_with_key(&reader, &pvk, &proof).map_err(runtime_error)
+                }
+                "bulletproofs" => {
+                    let (bp_gens, pc_gens) = bulletproofs_generators(bulletproofs_generators_count(&reader, &reader));
+                    let proof: R1CSProof = bincode::deserialize(proof).map_err(runtime_error)?;
+                    zkinterface_bulletproofs::r1cs::zkinterface_backend::verify_with_gens(&reader, &proof, &bp_gens, &pc_gens).map_err(runtime_error)
+                }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            }
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for proof.")))
+        }
+    })
+}
+
+/// Groth16 parameters that are parsed once and kept in memory, together with
+/// the prepared verifying key, so that they can be reused across proofs.
+#[pyclass(module = "zkpytoolkit.hazmat.bindings._rust.backend")]
+struct ProvingKey {
+    params: Parameters<Bls12>,
+    pvk: PreparedVerifyingKey<Bls12>,
+}
+
+/// A Groth16 verifying key that is parsed once and kept in memory, together with its prepared
+/// form. Unlike a ProvingKey, it only holds a few points per public input.
+#[pyclass(module = "zkpytoolkit.hazmat.bindings._rust.backend")]
+struct VerifyingKey {
+    vk: Groth16VerifyingKey<Bls12>,
+    pvk: PreparedVerifyingKey<Bls12>,
+}
+
+/// Either key can be used for verification.
+#[derive(FromPyObject)]
+enum VerifierKey<'a> {
+    Proving(PyRef<'a, ProvingKey>),
+    Verifying(PyRef<'a, VerifyingKey>),
+}
+
+impl<'a> VerifierKey<'a> {
+    fn keys(&self) -> (&Groth16VerifyingKey<Bls12>, &PreparedVerifyingKey<Bls12>) {
+        match self {
+            VerifierKey::Proving(key) => (&key.params.vk, &key.pvk),
+            VerifierKey::Verifying(key) => (&key.vk, &key.pvk),
+        }
+    }
+}
+
+/// Load a proving key from a CRS. The points are checked to lie in the prime order subgroups,
+/// unless `trusted` is set for keys we generated ourselves.
+#[pyfunction]
+#[pyo3(signature = (crs, backend=None, trusted=false))]
+fn load_key(
+    py: Python,
+    crs: Buffer,
+    backend: Option<String>,
+    trusted: bool,
+) -> PyResult<ProvingKey> {
+    let crs = crs.as_source();
+
+    py.allow_threads(|| match backend {
+        Some(s) => match s.as_str() {
+            "groth16" => {
+                let params = crs.read_parameters(trusted)?;
+                let pvk = prepare_verifying_key(&params.vk);
+                Ok(ProvingKey { params, pvk })
+            }
+            e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, does not use a proving key.", e)))
+        }
+        None => Err(exceptions::PyValueError::new_err(format!("No backend provided for loading the key.")))
+    })
+}
+
+/// Load a verifying key, either from a verifying key artifact or from the beginning of a CRS.
+/// Like for `load_key`, the points are checked unless `trusted` is set.
+#[pyfunction]
+#[pyo3(signature = (vk, backend=None, trusted=false))]
+fn load_verifying_key(
+    py: Python,
+    vk: Buffer,
+    backend: Option<String>,
+    trusted: bool,
+) -> PyResult<VerifyingKey> {
+    let vk = vk.as_source();
 
-    match reader.push_message(circuit.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-
-    match reader.push_message(constraints.as_bytes().to_vec()) {
-        Ok(_) => (),
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-
-    let workspace = Path::new(".").join(format!("cache_id_{}", id));
-    let zkp_key_workspace = create_folder(&workspace, "zkp_params_and_proofs");
-    let zkif_workspace = workspace.join(format!("zkif_export"));
-    let key_name = format!("{}_{}_key.dat", module_name, f_name);
-    let proof_name = format!("{}_{}_proof.dat", module_name, f_name);
-
-    // Unfortunately zkinterface consumers only read from files or stdin, so we define the cached zkif file paths.
-    let circuit_file = zkif_workspace.join(format!("header_{}_{}.zkif", module_name, f_name));
-    let constraints_file = zkif_workspace.join(format!("constraints_{}_{}.zkif", module_name, f_name));
-
-    let mut stats = Stats::default();
-    let ws = match Workspace::from_dirs_and_files(&[circuit_file, constraints_file]) {
-        Ok(ws) => ws,
-        Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-    };
-    stats.ingest_workspace(&ws);
-
-    match backend {
+    py.allow_threads(|| match backend {
         Some(s) => match s.as_str() {
-            "groth16" => match zkinterface_bellman::zkif_backend::verify(&reader, &zkp_key_workspace, &key_name, &proof_name) {
-                Ok(res) => Ok(res),
-                Err(err) => Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+            "groth16" => {
+                let vk = vk.read_verifying_key(trusted)?;
+                let pvk = prepare_verifying_key(&vk);
+                Ok(VerifyingKey { vk, pvk })
             }
-            "bulletproofs" => {
-                let generators_count = (stats.multiplications.next_power_of_two()*2) as usize;
-                let proof_path = zkp_key_workspace.join(proof_name);
-                
-                // Load from file.
-                let mut proof_ser = Vec::new();
-                File::open(&proof_path)?.read_to_end(&mut proof_ser)?;
-                let proof: R1CSProof = match bincode::deserialize(&proof_ser) {
-                    Ok(pf) => pf,
-                    Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
-                };
-                
-                match zkinterface_bulletproofs::r1cs::zkinterface_backend::verify(&reader, &proof, generators_count) {
-                    Ok(res) => Ok(res),
-                    Err(err) => return Err(exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))),
+            e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, does not use a verifying key.", e)))
+        }
+        None => Err(exceptions::PyValueError::new_err(format!("No backend provided for loading the key.")))
+    })
+}
+
+/// Extract the verifying key artifact from a CRS, reading only its beginning.
+#[pyfunction]
+fn export_verifying_key<'py>(py: Python<'py>, crs: Buffer) -> PyResult<&'py PyBytes> {
+    let crs = crs.as_source();
+
+    let vk_ser = py.allow_threads(|| -> PyResult<Vec<u8>> {
+        let mut vk_ser = Vec::new();
+        crs.read_verifying_key(true)?.write(&mut vk_ser)?;
+        Ok(vk_ser)
+    })?;
+    Ok(PyBytes::new(py, &vk_ser))
+}
+
+#[pyfunction]
+fn prove_with_key<'py>(
+    py: Python<'py>,
+    circuit: Buffer,
+    witness: Buffer,
+    constraints: Buffer,
+    key: PyRef<ProvingKey>,
+) -> PyResult<&'py PyBytes> {
+    let messages = [circuit.as_source(), witness.as_source(), constraints.as_source()];
+    let params = &key.params;
+
+    let proof_ser = py.allow_threads(|| -> PyResult<Vec<u8>> {
+        let reader = reader_from_messages(&messages)?;
+        let proof = zkif_backend::create_proof(&reader, params).map_err(runtime_error)?;
+        let mut proof_ser = Vec::new();
+        proof.write(&mut proof_ser)?;
+        Ok(proof_ser)
+    })?;
+    Ok(PyBytes::new(py, &proof_ser))
+}
+
+#[pyfunction]
+fn verify_with_key(
+    py: Python,
+    circuit: Buffer,
+    constraints: Buffer,
+    proof: &PyBytes,
+    key: VerifierKey,
+) -> PyResult<bool> {
+    let messages = [circuit.as_source(), constraints.as_source()];
+    let proof = proof.as_bytes();
+    let (_, pvk) = key.keys();
+
+    py.allow_threads(|| {
+        let reader = reader_from_messages(&messages)?;
+        let proof = Proof::<Bls12>::read(proof)?;
+        zkif_backend::verify_proof_with_key(&reader, pvk, &proof).map_err(runtime_error)
+    })
+}
+
+fn prove_batch_job(
+    circuit: &[u8],
+    witness: &[u8],
+    constraints: &BufferSource,
+    params: Option<&Parameters<Bls12>>,
+    backend: &str,
+) -> Result<Vec<u8>, Box<dyn std::error::Error + Send + Sync>> {
+    let messages = [BufferSource::Bytes(circuit), BufferSource::Bytes(witness), constraints.clone()];
+    let reader = reader_from_messages(&messages).map_err(|err| err.to_string())?;
+
+    let mut proof_ser = Vec::new();
+    match (backend, params) {
+        ("groth16", Some(params)) => {
+            let proof = zkif_backend::create_proof(&reader, params).map_err(|err| err.to_string())?;
+            proof.write(&mut proof_ser)?;
+        }
+        ("bulletproofs", _) => {
+            let (bp_gens, pc_gens) = bulletproofs_generators(bulletproofs_generators_count(&reader, &reader));
+            let proof = zkinterface_bulletproofs::r1cs::zkinterface_backend::prove_with_gens(&reader, &bp_gens, &pc_gens).map_err(|err| err.to_string())?;
+            proof_ser = bincode::serialize(&proof)?;
+        }
+        _ => unreachable!(),
+    }
+    Ok(proof_ser)
+}
+
+/// Prove many witnesses of one circuit on a pool of `max_workers` threads (all cores by default).
+/// `circuits` and `witnesses` hold the statement of each job, the constraints and key are shared.
+/// The proofs are returned in input order.
+#[pyfunction]
+#[pyo3(signature = (circuits, witnesses, constraints, key=None, backend=None, max_workers=None))]
+fn prove_batch<'py>(
+    py: Python<'py>,
+    circuits: Vec<&PyBytes>,
+    witnesses: Vec<&PyBytes>,
+    constraints: Buffer,
+    key: Option<PyRef<ProvingKey>>,
+    backend: Option<String>,
+    max_workers: Option<usize>,
+) -> PyResult<Vec<&'py PyBytes>> {
+    if circuits.len() != witnesses.len() {
+        return Err(exceptions::PyValueError::new_err("Expected as many circuits as witnesses."));
+    }
+    let backend = backend.ok_or_else(|| exceptions::PyValueError::new_err("No backend provided for proof."))?;
+    match backend.as_str() {
+        "groth16" if key.is_none() => return Err(exceptions::PyValueError::new_err("No key provided for proof.")),
+        "groth16" | "bulletproofs" => (),
+        e => return Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e))),
+    }
+
+    let jobs: Vec<(&[u8], &[u8])> = circuits.iter().map(|c| c.as_bytes()).zip(witnesses.iter().map(|w| w.as_bytes())).collect();
+    let constraints = constraints.as_source();
+    let params = key.as_ref().map(|key| &key.params);
+
+    let proofs = py.allow_threads(|| -> PyResult<Vec<_>> {
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(max_workers.unwrap_or(0))
+            .build()
+            .map_err(runtime_error)?;
+        Ok(pool.install(|| {
+            jobs.par_iter()
+                .map(|(circuit, witness)| prove_batch_job(circuit, witness, &constraints, params, &backend))
+                .collect()
+        }))
+    })?;
+
+    proofs.into_iter()
+        .map(|proof| proof.map(|proof| PyBytes::new(py, &proof)).map_err(runtime_error))
+        .collect()
+}
+
+/// Verify many proofs of one circuit. `circuits` holds the verification statement of each proof.
+/// The proofs are first checked together in one batch, and only checked one by one to find
+/// the invalid ones if the batch fails. Returns the validity of each proof in input order.
+#[pyfunction]
+#[pyo3(signature = (circuits, constraints, proofs, key=None, backend=None))]
+fn verify_batch(
+    py: Python,
+    circuits: Vec<&PyBytes>,
+    constraints: Buffer,
+    proofs: Vec<&PyBytes>,
+    key: Option<VerifierKey>,
+    backend: Option<String>,
+) -> PyResult<Vec<bool>> {
+    if circuits.len() != proofs.len() {
+        return Err(exceptions::PyValueError::new_err("Expected as many circuits as proofs."));
+    }
+    let circuits: Vec<&[u8]> = circuits.iter().map(|circuit| circuit.as_bytes()).collect();
+    let constraints = constraints.as_source();
+    let proofs: Vec<&[u8]> = proofs.iter().map(|proof| proof.as_bytes()).collect();
+    let key = key.as_ref().map(VerifierKey::keys);
+
+    py.allow_threads(|| {
+        // Only the statements are read for each proof. Groth16 only needs their public inputs,
+        // and the Bulletproofs verifier reads the constraints once for all of them.
+        let readers = circuits.iter()
+            .map(|circuit| reader_from_messages(&[BufferSource::Bytes(*circuit)]))
+            .collect::<PyResult<Vec<Reader>>>()?;
+
+        match backend {
+            Some(s) => match s.as_str() {
+                "groth16" => {
+                    let key = key.ok_or_else(|| exceptions::PyValueError::new_err("No key provided for verification."))?;
+                    // Proofs that cannot be parsed are invalid, and are left out of the batch.
+                    let proofs: Vec<Option<Proof<Bls12>>> = proofs.iter().map(|proof| Proof::read(*proof).ok()).collect();
+                    let instances: Vec<(&Reader, &Proof<Bls12>)> = readers.iter()
+                        .zip(proofs.iter())
+                        .filter_map(|(reader, proof)| proof.as_ref().map(|proof| (reader, proof)))
+                        .collect();
+
+                    let (vk, pvk) = key;
+                    if instances.len() == proofs.len() && zkif_backend::batch_verify_proofs(vk, &instances).map_err(runtime_error)? {
+                        return Ok(vec![true; proofs.len()]);
+                    }
+                    readers.iter().zip(proofs.iter())
+                        .map(|(reader, proof)| match proof {
+                            Some(proof) => zkif_backend::verify_proof_with_key(reader, pvk, proof).map_err(runtime_error),
+                            None => Ok(false),
+                        })
+                        .collect()
+                }
+                "bulletproofs" => {
+                    let constraints = reader_from_messages(&[constraints.clone()])?;
+                    let proofs: Vec<Option<R1CSProof>> = proofs.iter().map(|proof| bincode::deserialize(proof).ok()).collect();
+                    let instances: Vec<(&Reader, &R1CSProof)> = readers.iter()
+                        .zip(proofs.iter())
+                        .filter_map(|(reader, proof)| proof.as_ref().map(|proof| (reader, proof)))
+                        .collect();
+                    // The statements of one circuit have the same private variables, so the gates are counted once
+                    let generators_count = readers.first().map_or(0, |reader| bulletproofs_generators_count(reader, &constraints));
+                    let (bp_gens, pc_gens) = bulletproofs_generators(generators_count);
+
+                    if instances.len() == proofs.len() && zkinterface_bulletproofs::r1cs::zkinterface_backend::verify_batch_shared_with_gens(&instances, &constraints, &bp_gens, &pc_gens).map_err(runtime_error)? {
+                        return Ok(vec![true; proofs.len()]);
+                    }
+                    readers.iter().zip(proofs.iter())
+                        .map(|(reader, proof)| match proof {
+                            Some(proof) => zkinterface_bulletproofs::r1cs::zkinterface_backend::verify_circuit_with_gens(reader, &constraints, proof, &bp_gens, &pc_gens).map_err(runtime_error),
+                            None => Ok(false),
+                        })
+                        .collect()
                 }
+                e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
             }
-            e => Err(exceptions::PyValueError::new_err(format!("The backend: {}, is currently not supported.", e)))
+            None => Err(exceptions::PyValueError::new_err(format!("No backend provided for verification.")))
         }
-        None => Err(exceptions::PyValueError::new_err(format!("No backend provided for proof.")))
+    })
+}
+
+// Value of a linear combination under an assignment, or None if it refers to a variable
+// without a value. It is not reduced, the caller reduces the whole constraint at once.
+fn evaluate_lc(terms: &[Term], assignment: &HashMap<u64, Integer>) -> Option<Integer> {
+    let mut sum = Integer::new();
+    for term in terms {
+        sum += Integer::from_digits(term.value, Order::Lsf) * assignment.get(&term.id)?;
     }
+    Some(sum)
+}
+
+/// Check that a witness satisfies the constraints of a circuit, without proving. Unlike the
+/// backends, the constraints are evaluated directly on the zkif values over the field of the
+/// header, in parallel. Returns the index of the first unsatisfied constraint, or None.
+#[pyfunction]
+fn check_witness(
+    py: Python,
+    circuit: Buffer,
+    witness: Buffer,
+    constraints: Buffer,
+) -> PyResult<Option<usize>> {
+    let messages = [circuit.as_source(), witness.as_source(), constraints.as_source()];
+
+    py.allow_threads(|| {
+        let reader = reader_from_messages(&messages)?;
+        let field_maximum = reader.first_header()
+            .and_then(|header| header.field_maximum())
+            .ok_or_else(|| runtime_error("no field_maximum specified in the circuit header"))?;
+        let modulus = Integer::from_digits(field_maximum, Order::Lsf) + 1u32;
+
+        // Variable 0 is the constant one
+        let mut assignment = HashMap::new();
+        assignment.insert(0, Integer::from(1));
+        let variables = reader.instance_variables().into_iter().flatten()
+            .chain(reader.private_variables().into_iter().flatten());
+        for var in variables {
+            assignment.insert(var.id, Integer::from_digits(var.value, Order::Lsf));
+        }
+
+        let satisfied = |constraint: &Constraint| {
+            match (evaluate_lc(&constraint.a, &assignment), evaluate_lc(&constraint.b, &assignment), evaluate_lc(&constraint.c, &assignment)) {
+                (Some(a), Some(b), Some(c)) => (a * b - c).is_divisible(&modulus),
+                _ => false,
+            }
+        };
+        let constraints: Vec<Constraint> = reader.iter_constraints().collect();
+        Ok(constraints.par_iter().position_first(|constraint| !satisfied(constraint)))
+    })
 }
 
 pub(crate) fn create_submodule(py: pyo3::Python<'_>) -> pyo3::PyResult<&pyo3::prelude::PyModule> {
@@ -193,5 +672,19 @@ pub(crate) fn create_submodule(py: pyo3::Python<'_>) -> pyo3::PyResult<&pyo3::pr
     submod.add_function(pyo3::wrap_pyfunction!(setup, submod)?)?;
     submod.add_function(pyo3::wrap_pyfunction!(prove, submod)?)?;
     submod.add_function(pyo3::wrap_pyfunction!(verify, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(setup_in_memory, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(prove_in_memory, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(verify_in_memory, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(warm_up_generators, submod)?)?;
+    submod.add_class::<ProvingKey>()?;
+    submod.add_class::<VerifyingKey>()?;
+    submod.add_function(pyo3::wrap_pyfunction!(load_key, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(load_verifying_key, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(export_verifying_key, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(prove_with_key, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(verify_with_key, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(prove_batch, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(verify_batch, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(check_witness, submod)?)?;
     Ok(submod)
 }
@@ -2,7 +2,7 @@ use pyo3::{prelude::*, exceptions};
 
 use circ::ir::{opt::Opt, opt::opt, term::Computations};
 use circ_opt::CircOpt;
-use circ::cfg::cfg;
+use circ::cfg::{cfg, CircCfg};
 use zkpyc::export::{write_constraints, prepare_prover_statements, prepare_verifier_statements};
 use zkpyc::front::{self, Mode::Proof, FrontEnd, python::Inputs};
 use zkpyc::utilities::r1cs::{ProverData, VerifierData};
@@ -12,21 +12,91 @@ use zkpyc::utilities::{opt::reduce_linearities, trans::to_r1cs};
 use zkpyc::utilities::scalar_fields::bls12_381::Bls12_381;
 use zkpyc::utilities::scalar_fields::bn256::Bn256;
 use curve25519_dalek::scalar::Scalar as Curve25519;
+use pyo3::types::{PyBytes, PyDict};
+use rug::{Integer, integer::Order};
+use std::any::Any;
+use std::fmt::Write as _;
 use std::fs::{File, remove_file, self};
 use std::io::Write;
 use std::panic;
 use std::path::{Path, PathBuf};
+use std::sync::Mutex;
+use std::time::Instant;
 
 use crate::ff_constants::*;
-use crate::utilities::{create_folder, rename_zkif_file};
+use crate::utilities::{chunk_zkif_constraints, create_folder, rename_zkif_file, scratch_name, write_atomic, zkif_stats, Buffer, BufferSource, ScratchDir, CONSTRAINTS_PER_MESSAGE};
 
 enum Modulus {
     Integer(rug::Integer)
 }
 
+/// Inputs of a proof or verification statement, either as the text parsed by ZKPyC, or as
+/// flattened arguments `(modulus, [(name, kind, shape, data), ...])` where `data` holds the
+/// elements in row-major order as little-endian integers of 32 (field), 4 (int) or 1 (bool) bytes.
+#[derive(FromPyObject)]
+enum StatementInputs<'a> {
+    Text(String),
+    Structured(Option<String>, Vec<(String, String, Vec<usize>, &'a PyBytes)>),
+}
+
+impl<'a> StatementInputs<'a> {
+    // ZKPyC only reads inputs from a text file, so structured inputs are rendered into that
+    // format here rather than element by element in Python. Without a modulus of their own,
+    // they are parsed in `default_modulus` if given, instead of the compiler's field.
+    fn into_text(self, default_modulus: Option<&str>) -> PyResult<String> {
+        let (modulus, arguments) = match self {
+            StatementInputs::Text(text) => return Ok(text),
+            StatementInputs::Structured(modulus, arguments) => (modulus, arguments),
+        };
+
+        let mut text = String::from("(let (\n");
+        for (name, kind, shape, data) in arguments {
+            let width = match kind.as_str() {
+                "field" => 32,
+                "int" => 4,
+                "bool" => 1,
+                e => return Err(exceptions::PyValueError::new_err(format!("Unsupported input kind: {}", e))),
+            };
+            let data = data.as_bytes();
+            let count: usize = shape.iter().product();
+            if data.len() != count * width {
+                return Err(exceptions::PyValueError::new_err(format!("Expected {} bytes for input {}, got {}.", count * width, name, data.len())));
+            }
+
+            let mut index = vec![0; shape.len()];
+            for element in data.chunks_exact(width) {
+                let _ = write!(text, "    ({}", name);
+                for i in &index {
+                    let _ = write!(text, ".{}", i);
+                }
+                let _ = match width {
+                    32 => writeln!(text, " #f{})", Integer::from_digits(element, Order::Lsf)),
+                    4 => writeln!(text, " #x{:08x})", u32::from_le_bytes(element.try_into().unwrap())),
+                    _ => writeln!(text, " {})", element[0] != 0),
+                };
+                // Advance the row-major index
+                for (i, len) in index.iter_mut().zip(&shape).rev() {
+                    *i += 1;
+                    if *i < *len {
+                        break;
+                    }
+                    *i = 0;
+                }
+            }
+        }
+        text.push_str(")\n    false\n)");
+
+        Ok(match modulus.as_deref().or(default_modulus) {
+            Some(modulus) => format!("(set_default_modulus {}\n{})", modulus, text),
+            None => text,
+        })
+    }
+}
+
 trait ProverOrVerifier {
     fn identifier() -> &'static str;
     fn input_type() -> &'static str;
+    fn statement_files() -> &'static [&'static str];
     fn prepare_statements<F: PrimeField>(
         f_name: &str,
         module_name: &str,
@@ -50,6 +120,10 @@ impl ProverOrVerifier for Prover {
         "pin"
     }
 
+    fn statement_files() -> &'static [&'static str] {
+        &["header", "witness"]
+    }
+
     fn prepare_statements<F: PrimeField>(
         f_name: &str,
         module_name: &str,
@@ -80,6 +154,10 @@ impl ProverOrVerifier for Verifier {
         "vin"
     }
 
+    fn statement_files() -> &'static [&'static str] {
+        &["header"]
+    }
+
     fn prepare_statements<F: PrimeField>(
         f_name: &str,
         module_name: &str,
@@ -99,7 +177,52 @@ impl ProverOrVerifier for Verifier {
     }
 }
 
-fn optimize_computations(cs: Computations) -> Computations {
+// Wall-clock seconds spent in each stage of a compilation, in the order they ran
+type StageTimings = Vec<(String, f64)>;
+
+fn time_stage<T>(timings: &mut StageTimings, stage: &str, f: impl FnOnce() -> T) -> T {
+    let start = Instant::now();
+    let result = f();
+    timings.push((String::from(stage), start.elapsed().as_secs_f64()));
+    result
+}
+
+/// Optimization settings of a compilation. An explicit list of `passes` replaces the pass list
+/// of `opt_level`, which still selects how far linearities are reduced.
+struct OptConfig {
+    opt_level: usize,
+    passes: Option<Vec<String>>,
+}
+
+// Linear combinations of up to this many terms are substituted into the constraints that use
+// them at opt_level 3, instead of the circ default of 50.
+const AGGRESSIVE_LC_ELIM_THRESH: usize = 1000;
+
+fn parse_pass(name: &str) -> PyResult<Opt> {
+    match name {
+        "ScalarizeVars" => Ok(Opt::ScalarizeVars),
+        "Flatten" => Ok(Opt::Flatten),
+        "Sha" => Ok(Opt::Sha),
+        "ConstantFold" => Ok(Opt::ConstantFold(Box::new([]))),
+        "ParseCondStores" => Ok(Opt::ParseCondStores),
+        "Tuple" => Ok(Opt::Tuple),
+        "Obliv" => Ok(Opt::Obliv),
+        "PersistentRam" => Ok(Opt::PersistentRam),
+        "VolatileRam" => Ok(Opt::VolatileRam),
+        "SkolemizeChallenges" => Ok(Opt::SkolemizeChallenges),
+        "LinearScan" => Ok(Opt::LinearScan),
+        _ => Err(exceptions::PyValueError::new_err(format!("Unknown optimization pass: {}", name))),
+    }
+}
+
+fn optimization_passes(config: &OptConfig) -> PyResult<Vec<Opt>> {
+    if let Some(passes) = &config.passes {
+        return passes.iter().map(|name| parse_pass(name)).collect();
+    }
+    if !(1..=3).contains(&config.opt_level) {
+        return Err(exceptions::PyValueError::new_err(format!("Unknown optimization level: {}", config.opt_level)));
+    }
+
     let mut opts = Vec::new();
 
     opts.push(Opt::ScalarizeVars);
@@ -114,70 +237,119 @@ fn optimize_computations(cs: Computations) -> Computations {
     opts.push(Opt::Obliv);
     // The obliv elim pass produces more tuples, that must be eliminated
     opts.push(Opt::Tuple);
-    // The following optimizations are run when the ram option is enabled
-    // We will assume it is true by default because cfg() does not expose
-    // CircOpt yet (it is still private), and a workaround isn't worth it.
-    opts.push(Opt::PersistentRam);
-    opts.push(Opt::VolatileRam);
-    opts.push(Opt::SkolemizeChallenges);
-    opts.push(Opt::LinearScan);
-    // The linear scan pass produces more tuples, that must be eliminated
-    opts.push(Opt::Tuple);
+    // The RAM passes are only needed for arrays accessed at secret indices, which opt_level 1
+    // assumes there are none of.
+    if config.opt_level >= 2 {
+        opts.push(Opt::PersistentRam);
+        opts.push(Opt::VolatileRam);
+        opts.push(Opt::SkolemizeChallenges);
+        opts.push(Opt::LinearScan);
+        // The linear scan pass produces more tuples, that must be eliminated
+        opts.push(Opt::Tuple);
+    }
     opts.push(Opt::Flatten);
     opts.push(Opt::ConstantFold(Box::new([])));
-    opt(cs, opts)
+    Ok(opts)
+}
+
+fn optimize_computations(cs: Computations, opts: Vec<Opt>, timings: &mut StageTimings) -> Computations {
+    // The passes are applied one at a time, to time each of them
+    opts.into_iter().fold(cs, |cs, pass| {
+        let stage = format!("opt {:?}", pass);
+        time_stage(timings, &stage, || opt(cs, vec![pass]))
+    })
+}
+
+// The circ config of the process, with a higher threshold for eliminating linear combinations
+fn aggressive_cfg() -> CircCfg {
+    let mut circ_options = CircOpt::default();
+    circ_options.field.custom_modulus = cfg().field().modulus().to_string();
+    circ_options.r1cs.lc_elim_thresh = AGGRESSIVE_LC_ELIM_THRESH;
+    CircCfg::from(circ_options)
 }
 
 fn run_zkpyc_compiler(
     f_name: &String,
     inputs: Inputs,
-) -> PyResult<(ProverData, VerifierData, usize)> {    
-    let cs = front::python::PythonFE::gen(inputs);
-    let cs = optimize_computations(cs);
+    config: &OptConfig,
+) -> PyResult<(ProverData, VerifierData, usize, StageTimings)> {
+    let opts = optimization_passes(config)?;
+    let mut timings = StageTimings::new();
+    let cs = time_stage(&mut timings, "frontend", || front::python::PythonFE::gen(inputs));
+    let cs = optimize_computations(cs, opts, &mut timings);
     let cs = cs.get(f_name);
-    let mut r1cs = to_r1cs(cs, cfg());
-    r1cs = reduce_linearities(r1cs, cfg());
+    let r1cs = time_stage(&mut timings, "to_r1cs", || to_r1cs(cs, cfg()));
+    let r1cs = time_stage(&mut timings, "reduce_linearities", || match config.opt_level {
+        3 => reduce_linearities(r1cs, &aggressive_cfg()),
+        _ => reduce_linearities(r1cs, cfg()),
+    });
     let constraints_count = r1cs.constraints().len();
-    let (prover_data, verifier_data) = r1cs.finalize(cs);
-    Ok((prover_data, verifier_data, constraints_count))
+    let (prover_data, verifier_data) = time_stage(&mut timings, "finalize", || r1cs.finalize(cs));
+    Ok((prover_data, verifier_data, constraints_count, timings))
 }
 
+static COMPILER_MODULUS: Mutex<Option<String>> = Mutex::new(None);
+
 #[pyfunction]
 #[pyo3(signature = (
     modulus="52435875175126190479447740508185965837690552500527637822603658699938581184513",
 ))]
-fn init(modulus: &str) -> PyResult<()> {
+fn init(modulus: &str) -> PyResult<bool> {
+    // The circ config lives in a OnceCell, so the compiler front-end can only be set up for
+    // one modulus per process. Returns whether that modulus is `modulus`.
+    let mut compiler_modulus = COMPILER_MODULUS.lock().unwrap_or_else(|err| err.into_inner());
+    if let Some(current) = compiler_modulus.as_ref() {
+        return Ok(current == modulus);
+    }
+
     let mut circ_options = CircOpt::default();
     circ_options.field.custom_modulus = String::from(modulus);
-    // We will make the circ_options customizable in the future.
+    // The optimizations are chosen per compilation, see OptConfig.
     circ::cfg::set(&circ_options);
-    Ok(())
+    *compiler_modulus = Some(String::from(modulus));
+    Ok(true)
 }
 
 #[pyfunction]
 #[pyo3(signature = (id=0))]
-fn cleanup(id: usize) -> PyResult<()> {
-    let workspace = create_folder(Path::new("."), &format!("cache_id_{}", id));
-    Ok(fs::remove_dir_all(workspace)?)
+fn cleanup(py: Python, id: usize) -> PyResult<()> {
+    py.allow_threads(|| {
+        let workspace = create_folder(Path::new("."), &format!("cache_id_{}", id));
+        Ok(fs::remove_dir_all(workspace)?)
+    })
 }
 
-#[pyfunction]
-#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__")))]
-fn compile(
-    _py: Python,
-    f_name: String,
-    input: String,
+fn panic_message(panic_payload: Box<dyn Any + Send>) -> String {
+    // Try to extract the panic message from the payload
+    if let Some(msg) = panic_payload.downcast_ref::<&str>() {
+        msg.to_string()
+    } else if let Some(msg) = panic_payload.downcast_ref::<String>() {
+        msg.clone()
+    } else {
+        "Unknown panic message".to_string()
+    }
+}
+
+fn compile_source(
+    f_name: &String,
+    input: &String,
     id: usize,
-    module_name: String,
-) -> PyResult<usize> {
-    // Define directory where ZKP data will be stored
-    let workspace = create_folder(Path::new("."), &format!("cache_id_{}", id));
-    
-    let file_path = Path::new(".").join(PathBuf::from(format!(".id_{}_{}_{}.py", id, module_name, f_name)));
-    let mut file = File::create(&file_path)?;
+    module_name: &String,
+    config: &OptConfig,
+) -> PyResult<(ProverData, VerifierData, usize, StageTimings)> {
     // Because of how the compiler is written, we need to temporarily
-    // store source code as a file.
-    file.write_all(input.as_bytes())?;
+    // store source code as a file. It is named uniquely, so that concurrent
+    // compilations of the same function do not overwrite or remove each
+    // other's source. It stays in the working directory rather than in a
+    // scratch directory, as imports of the user's own modules are resolved
+    // next to it.
+    let file_name = format!("{}.py", scratch_name(&format!(".id_{}_{}_{}", id, module_name, f_name)));
+    let file_path = Path::new(".").join(PathBuf::from(file_name));
+    let mut file = File::create(&file_path)?;
+    if let Err(err) = file.write_all(input.as_bytes()) {
+        let _ = remove_file(&file_path);
+        return Err(err.into());
+    }
 
     let inputs = front::python::Inputs {
         file: file_path.clone(),
@@ -189,35 +361,23 @@ fn compile(
     panic::set_hook(Box::new(|_info| {
         // do nothing
     }));
-    let result = panic::catch_unwind(|| run_zkpyc_compiler(&f_name, inputs));
+    let result = panic::catch_unwind(|| run_zkpyc_compiler(f_name, inputs, config));
 
     // Remove temporary function definition file.
-    let (pd, vd, constr_count) = match result {
-        Ok(Ok(res)) => {
-            remove_file(&file_path)?;
-            res
-        }
-        Ok(Err(err)) => {
-            remove_file(&file_path)?;
-            return Err(err);
-        }
-        Err(panic_payload) => {
-            // Try to extract the panic message from the payload
-            let panic_msg = if let Some(msg) = panic_payload.downcast_ref::<&str>() {
-                msg.to_string()
-            } else if let Some(msg) = panic_payload.downcast_ref::<String>() {
-                msg.clone()
-            } else {
-                "Unknown panic message".to_string()
-            };
-
-            // Return the panic message as a Python error
-            // return Err(PyErr::new::<exc::RuntimeError, _>(_py, panic_msg));
-            return Err(exceptions::PySyntaxError::new_err(panic_msg));
-        }
-    };
+    remove_file(&file_path)?;
+    match result {
+        Ok(res) => res,
+        // Return the panic message as a Python error
+        Err(panic_payload) => Err(exceptions::PySyntaxError::new_err(panic_message(panic_payload))),
+    }
+}
 
-    let zkif_workspace = create_folder(&workspace, "zkif_export");
+fn export_constraints(
+    pd: &ProverData,
+    f_name: &String,
+    module_name: &String,
+    zkif_workspace: &Path,
+) -> PyResult<()> {
     match Modulus::Integer(cfg().field().modulus().clone()) {
         Modulus::Integer(i) if i == get_bls12_381_const() => write_constraints::<Bls12_381>(&pd.r1cs, &f_name, &zkif_workspace),
         Modulus::Integer(i) if i == get_bn256_const() => write_constraints::<Bn256>(&pd.r1cs, &f_name, &zkif_workspace),
@@ -227,45 +387,185 @@ fn compile(
         exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))
     })?;
 
-    // Change the zkif name to contain information about the module and function name.
+    // Change the zkif name to contain information about the module and function name. The
+    // constraints are stored in messages of a bounded number of constraints, like the exports
+    // of the backends.
     let new_constraints_name = format!("constraints_{}_{}", module_name, f_name);
     let new_header_name = format!("header_{}_{}", module_name, f_name);
-    rename_zkif_file("constraints_0", &new_constraints_name, &zkif_workspace)?;
+    chunk_zkif_constraints(&new_constraints_name, &zkif_workspace, CONSTRAINTS_PER_MESSAGE).map_err(|err| {
+        exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))
+    })?;
     rename_zkif_file("header", &new_header_name, &zkif_workspace)?;
+    Ok(())
+}
 
+#[pyfunction]
+#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__"), opt_level=2, passes=None))]
+fn compile(
+    py: Python,
+    f_name: String,
+    input: String,
+    id: usize,
+    module_name: String,
+    opt_level: usize,
+    passes: Option<Vec<String>>,
+) -> PyResult<usize> {
+    let config = OptConfig { opt_level, passes };
+    // The compiler terms are not Send, so everything from compilation to
+    // serialization runs without the GIL and only the count is returned.
+    py.allow_threads(|| {
+        // Define directory where ZKP data will be stored. The files are exported into a scratch
+        // directory next to it, on the same filesystem, and each is renamed into place once
+        // complete, so concurrent compilations and readers never see partial files.
+        let workspace = create_folder(Path::new("."), &format!("cache_id_{}", id));
+        let zkif_workspace = create_folder(&workspace, "zkif_export");
+        let zkp_data_workspace = create_folder(&workspace, "zkp_data");
+
+        let scratch = ScratchDir::new_in(Path::new("."), &format!(".cache_id_{}", id))?;
+        let constr_count = compile_into(&f_name, &input, id, &module_name, &config, scratch.path())?;
+
+        let header_name = format!("header_{}_{}.zkif", module_name, f_name);
+        let constraints_name = format!("constraints_{}_{}.zkif", module_name, f_name);
+        fs::rename(scratch.path().join(&header_name), zkif_workspace.join(&header_name))?;
+        fs::rename(scratch.path().join(&constraints_name), zkif_workspace.join(&constraints_name))?;
+        fs::rename(scratch.path().join("prover_data.dat"), zkp_data_workspace.join(format!("{}_{}_prover_data.dat", module_name, f_name)))?;
+        fs::rename(scratch.path().join("verifier_data.dat"), zkp_data_workspace.join(format!("{}_{}_verifier_data.dat", module_name, f_name)))?;
+
+        Ok(constr_count)
+    })
+}
 
-    let zkp_data_workspace = create_folder(&workspace, "zkp_data");
-    let pd_path = zkp_data_workspace.join(format!("{}_{}_prover_data.dat", module_name, f_name));
-    let vd_path = zkp_data_workspace.join(format!("{}_{}_verifier_data.dat", module_name, f_name));
+// Exports the header, constraints, prover data and verifier data into `folder`, and returns the
+// constraint count.
+fn compile_into(
+    f_name: &String,
+    input: &String,
+    id: usize,
+    module_name: &String,
+    config: &OptConfig,
+    folder: &Path,
+) -> PyResult<usize> {
+    let (pd, vd, constr_count, _) = compile_source(f_name, input, id, module_name, config)?;
 
-    serialize_into_file(&pd, pd_path)?;
-    serialize_into_file(&vd, vd_path)?;
-    
+    export_constraints(&pd, f_name, module_name, folder)?;
+    serialize_into_file(&pd, folder.join("prover_data.dat"))?;
+    serialize_into_file(&vd, folder.join("verifier_data.dat"))?;
     Ok(constr_count)
 }
 
-fn setup_proof_or_verification<PV: ProverOrVerifier>(
-    _py: Python,
+// Returns the constraint count together with the header, constraints, prover data and
+// verifier data as bytes.
+fn compile_to_bytes(
+    f_name: &String,
+    input: &String,
+    id: usize,
+    module_name: &String,
+    config: &OptConfig,
+) -> PyResult<(usize, Vec<u8>, Vec<u8>, Vec<u8>, Vec<u8>)> {
+    // The ZKPyC exporters only write to files, so their output is collected
+    // from a private scratch directory that is removed right after.
+    let scratch = ScratchDir::new()?;
+    let constr_count = compile_into(f_name, input, id, module_name, config, scratch.path())?;
+
+    let header = fs::read(scratch.path().join(format!("header_{}_{}.zkif", module_name, f_name)))?;
+    let constraints = fs::read(scratch.path().join(format!("constraints_{}_{}.zkif", module_name, f_name)))?;
+    let pd_bytes = fs::read(scratch.path().join("prover_data.dat"))?;
+    let vd_bytes = fs::read(scratch.path().join("verifier_data.dat"))?;
+    Ok((constr_count, header, constraints, pd_bytes, vd_bytes))
+}
+
+/// Compile without keeping anything under `cache_id_{id}`. Returns the constraint count
+/// together with the header, constraints, prover data and verifier data as bytes.
+#[pyfunction]
+#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__"), opt_level=2, passes=None))]
+fn compile_in_memory<'py>(
+    py: Python<'py>,
     f_name: String,
     input: String,
     id: usize,
     module_name: String,
-) -> PyResult<()> {
-    let workspace = create_folder(Path::new("."), &format!("cache_id_{}", id));
-    let zkif_workspace = create_folder(&workspace, "zkif_export");
-    let zkp_data_workspace = create_folder(&workspace, "zkp_data");
+    opt_level: usize,
+    passes: Option<Vec<String>>,
+) -> PyResult<(usize, &'py PyBytes, &'py PyBytes, &'py PyBytes, &'py PyBytes)> {
+    let config = OptConfig { opt_level, passes };
+    let (constr_count, header, constraints, pd_bytes, vd_bytes) = py.allow_threads(|| {
+        compile_to_bytes(&f_name, &input, id, &module_name, &config)
+    })?;
 
-    let identifier = PV::identifier();
-    let pd_or_vd_path = zkp_data_workspace.join(format!("{}_{}_{}_data.dat", module_name, f_name, identifier));
-    let inputs_path = Path::new(".").join(PathBuf::from(format!(".id_{}_{}_{}.py.{}", id, module_name, f_name, PV::input_type())));
-    let mut file = File::create(&inputs_path)?;
-    file.write_all(input.as_bytes())?;
+    Ok((
+        constr_count,
+        PyBytes::new(py, &header),
+        PyBytes::new(py, &constraints),
+        PyBytes::new(py, &pd_bytes),
+        PyBytes::new(py, &vd_bytes),
+    ))
+}
 
+/// Compile without keeping anything, and report the size of the resulting R1CS together with
+/// the time spent in each stage of the compiler.
+#[pyfunction]
+#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__"), opt_level=2, passes=None))]
+fn profile<'py>(
+    py: Python<'py>,
+    f_name: String,
+    input: String,
+    id: usize,
+    module_name: String,
+    opt_level: usize,
+    passes: Option<Vec<String>>,
+) -> PyResult<&'py PyDict> {
+    let config = OptConfig { opt_level, passes };
+    let (stats, timings) = py.allow_threads(|| -> PyResult<_> {
+        let (pd, _, _, mut timings) = compile_source(&f_name, &input, id, &module_name, &config)?;
+
+        let scratch = ScratchDir::new()?;
+        time_stage(&mut timings, "export", || export_constraints(&pd, &f_name, &module_name, scratch.path()))?;
+        let header = fs::read(scratch.path().join(format!("header_{}_{}.zkif", module_name, f_name)))?;
+        let constraints = fs::read(scratch.path().join(format!("constraints_{}_{}.zkif", module_name, f_name)))?;
+        let stats = zkif_stats(&header, &constraints).map_err(|err| {
+            exceptions::PyRuntimeError::new_err(format!("An error occurred: {}", err))
+        })?;
+        Ok((stats, timings))
+    })?;
+
+    let terms = PyDict::new(py);
+    terms.set_item("a", stats.terms[0])?;
+    terms.set_item("b", stats.terms[1])?;
+    terms.set_item("c", stats.terms[2])?;
+
+    let report = PyDict::new(py);
+    report.set_item("constraints", stats.constraints)?;
+    report.set_item("variables", stats.public_inputs + stats.private_variables)?;
+    report.set_item("public_inputs", stats.public_inputs)?;
+    report.set_item("terms", terms)?;
+    report.set_item("timings", timings)?;
+    Ok(report)
+}
+
+// Statements only depend on the field of the compiled circuit, so unlike compilation they can
+// be generated for any modulus, not just the one of the process-wide compiler config.
+fn statement_modulus(modulus: Option<String>) -> PyResult<Modulus> {
+    match modulus {
+        Some(modulus) => Integer::from_str_radix(&modulus, 10)
+            .map(Modulus::Integer)
+            .map_err(|err| exceptions::PyValueError::new_err(format!("Invalid modulus {}: {}", modulus, err))),
+        None => Ok(Modulus::Integer(cfg().field().modulus().clone())),
+    }
+}
+
+fn prepare_statements_for_field<PV: ProverOrVerifier>(
+    f_name: &String,
+    module_name: &String,
+    inputs_path: &Path,
+    pd_or_vd_path: &Path,
+    zkif_workspace: &Path,
+    modulus: Modulus,
+) -> PyResult<()> {
     // Run verifier or proof statement setup and catch panic or other PyErrors
     panic::set_hook(Box::new(|_info| {}));
 
     let result = panic::catch_unwind(|| {
-        match Modulus::Integer(cfg().field().modulus().clone()) {
+        match modulus {
             Modulus::Integer(i) if i == get_bls12_381_const() => PV::prepare_statements::<Bls12_381>(&f_name, &module_name, &inputs_path, &pd_or_vd_path, &zkif_workspace, false),
             Modulus::Integer(i) if i == get_bn256_const() => PV::prepare_statements::<Bn256>(&f_name, &module_name, &inputs_path, &pd_or_vd_path, &zkif_workspace, false),
             Modulus::Integer(i) if i == get_curve25519_const() => PV::prepare_statements::<Curve25519>(&f_name, &module_name, &inputs_path, &pd_or_vd_path, &zkif_workspace, false),
@@ -276,49 +576,146 @@ fn setup_proof_or_verification<PV: ProverOrVerifier>(
     });
 
     match result {
-        Ok(Ok(_)) => {
-            remove_file(&inputs_path)?;
-            Ok(())
-        }
-        Ok(Err(err)) => {
-            remove_file(&inputs_path)?;
-            Err(err)
-        }
-        Err(panic_payload) => {
-            let panic_msg = if let Some(msg) = panic_payload.downcast_ref::<&str>() {
-                msg.to_string()
-            } else if let Some(msg) = panic_payload.downcast_ref::<String>() {
-                msg.clone()
-            } else {
-                "Unknown panic message".to_string()
-            };
-            Err(exceptions::PySyntaxError::new_err(panic_msg))
-        }
+        Ok(res) => res,
+        Err(panic_payload) => Err(exceptions::PySyntaxError::new_err(panic_message(panic_payload))),
     }
 }
 
+fn setup_proof_or_verification<'py, PV: ProverOrVerifier>(
+    py: Python<'py>,
+    f_name: String,
+    input: StatementInputs<'py>,
+    id: usize,
+    module_name: String,
+    modulus: Option<String>,
+) -> PyResult<()> {
+    let input = input.into_text(modulus.as_deref())?;
+    let modulus = statement_modulus(modulus)?;
+    let workspace = create_folder(Path::new("."), &format!("cache_id_{}", id));
+    let zkif_workspace = create_folder(&workspace, "zkif_export");
+    let zkp_data_workspace = create_folder(&workspace, "zkp_data");
+
+    let identifier = PV::identifier();
+    let pd_or_vd_path = zkp_data_workspace.join(format!("{}_{}_{}_data.dat", module_name, f_name, identifier));
+
+    py.allow_threads(|| {
+        // Generate the statements in a workspace of their own and only rename the complete
+        // files into cache_id_{id}, so that concurrent invocations do not clobber each other.
+        let scratch = ScratchDir::in_shared_memory()?;
+        let statements = prepare_statements_in_scratch::<PV>(&scratch, &f_name, &module_name, &input, &pd_or_vd_path, modulus)?;
+        for (name, statement) in PV::statement_files().iter().zip(statements) {
+            write_atomic(&zkif_workspace.join(format!("{}_{}_{}.zkif", name, module_name, f_name)), &statement)?;
+        }
+        Ok(())
+    })
+}
+
+// Returns the contents of PV::statement_files(), in that order
+fn prepare_statements_in_scratch<PV: ProverOrVerifier>(
+    scratch: &ScratchDir,
+    f_name: &String,
+    module_name: &String,
+    input: &str,
+    pd_or_vd_path: &Path,
+    modulus: Modulus,
+) -> PyResult<Vec<Vec<u8>>> {
+    let inputs_path = scratch.path().join(format!("{}_{}.py.{}", module_name, f_name, PV::input_type()));
+    fs::write(&inputs_path, input.as_bytes())?;
+
+    prepare_statements_for_field::<PV>(f_name, module_name, &inputs_path, pd_or_vd_path, scratch.path(), modulus)?;
+
+    PV::statement_files().iter()
+        .map(|name| fs::read(scratch.path().join(format!("{}_{}_{}.zkif", name, module_name, f_name))).map_err(PyErr::from))
+        .collect()
+}
+
+fn setup_proof_or_verification_in_memory<'py, PV: ProverOrVerifier>(
+    py: Python<'py>,
+    f_name: String,
+    input: StatementInputs<'py>,
+    pd_or_vd: Buffer,
+    module_name: String,
+    modulus: Option<String>,
+) -> PyResult<Vec<&'py PyBytes>> {
+    let input = input.into_text(modulus.as_deref())?;
+    let modulus = statement_modulus(modulus)?;
+    let pd_or_vd = pd_or_vd.as_source();
+
+    let statements = py.allow_threads(|| -> PyResult<Vec<Vec<u8>>> {
+        let scratch = ScratchDir::in_shared_memory()?;
+
+        // ZKPyC only reads the prover or verifier data from a file, so a file is used as is and
+        // only bytes are written out
+        let pd_or_vd_path = match pd_or_vd {
+            BufferSource::Path(path) => path,
+            BufferSource::Bytes(bytes) => {
+                let path = scratch.path().join(format!("{}_data.dat", PV::identifier()));
+                fs::write(&path, bytes)?;
+                path
+            }
+        };
+
+        prepare_statements_in_scratch::<PV>(&scratch, &f_name, &module_name, &input, &pd_or_vd_path, modulus)
+    })?;
+    Ok(statements.iter().map(|statement| PyBytes::new(py, statement)).collect())
+}
+
 #[pyfunction]
-#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__")))]
-fn setup_proof(
-    _py: Python,
+#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__"), modulus=None))]
+fn setup_proof<'py>(
+    py: Python<'py>,
     f_name: String,
-    input: String,
+    input: StatementInputs<'py>,
     id: usize,
     module_name: String,
+    modulus: Option<String>,
 ) -> PyResult<()> {
-    setup_proof_or_verification::<Prover>(_py, f_name, input, id, module_name)
+    setup_proof_or_verification::<Prover>(py, f_name, input, id, module_name, modulus)
 }
 
 #[pyfunction]
-#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__")))]
-fn setup_verification(
-    _py: Python,
+#[pyo3(signature = (f_name, input, id=0, module_name=String::from("__main__"), modulus=None))]
+fn setup_verification<'py>(
+    py: Python<'py>,
     f_name: String,
-    input: String,
+    input: StatementInputs<'py>,
     id: usize,
     module_name: String,
+    modulus: Option<String>,
 ) -> PyResult<()> {
-    setup_proof_or_verification::<Verifier>(_py, f_name, input, id, module_name)
+    setup_proof_or_verification::<Verifier>(py, f_name, input, id, module_name, modulus)
+}
+
+/// Returns the header and witness messages of the proof statement as bytes. The prover data is
+/// given either as bytes or as the path of its file.
+#[pyfunction]
+#[pyo3(signature = (f_name, input, prover_data, module_name=String::from("__main__"), modulus=None))]
+fn setup_proof_in_memory<'py>(
+    py: Python<'py>,
+    f_name: String,
+    input: StatementInputs<'py>,
+    prover_data: Buffer,
+    module_name: String,
+    modulus: Option<String>,
+) -> PyResult<(&'py PyBytes, &'py PyBytes)> {
+    let statements = setup_proof_or_verification_in_memory::<Prover>(py, f_name, input, prover_data, module_name, modulus)?;
+    Ok((statements[0], statements[1]))
+}
+
+/// Returns the header message of the verification statement as bytes. The verifier data is
+/// given either as bytes or as the path of its file.
+#[pyfunction]
+#[pyo3(signature = (f_name, input, verifier_data, module_name=String::from("__main__"), modulus=None))]
+fn setup_verification_in_memory<'py>(
+    py: Python<'py>,
+    f_name: String,
+    input: StatementInputs<'py>,
+    verifier_data: Buffer,
+    module_name: String,
+    modulus: Option<String>,
+) -> PyResult<&'py PyBytes> {
+    let statements = setup_proof_or_verification_in_memory::<Verifier>(py, f_name, input, verifier_data, module_name, modulus)?;
+    Ok(statements[0])
 }
 
 pub(crate) fn create_submodule(py: pyo3::Python<'_>) -> pyo3::PyResult<&pyo3::prelude::PyModule> {
@@ -328,5 +725,9 @@ pub(crate) fn create_submodule(py: pyo3::Python<'_>) -> pyo3::PyResult<&pyo3::pr
     submod.add_function(pyo3::wrap_pyfunction!(cleanup, submod)?)?;
     submod.add_function(pyo3::wrap_pyfunction!(setup_proof, submod)?)?;
     submod.add_function(pyo3::wrap_pyfunction!(setup_verification, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(compile_in_memory, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(profile, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(setup_proof_in_memory, submod)?)?;
+    submod.add_function(pyo3::wrap_pyfunction!(setup_verification_in_memory, submod)?)?;
     Ok(submod)
 }
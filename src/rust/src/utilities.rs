@@ -1,14 +1,18 @@
+use std::convert::TryFrom;
 use std::path::{Path, PathBuf};
-use std::fs;
+use std::fs::{self, File};
+use std::io::{BufWriter, Write};
+use memmap2::Mmap;
+use pyo3::{prelude::*, types::PyBytes};
+use std::sync::atomic::{AtomicUsize, Ordering};
+use zkinterface::{ConstraintSystem, Reader};
 
 
 pub fn create_folder(workspace: &Path, folder_name: &str) -> PathBuf {
     let folder_path = workspace.join(folder_name);
 
-    // Create the folder if it doesn't exist
-    if !folder_path.exists() {
-        fs::create_dir(&folder_path).expect(&format!("Failed to create folder {}", folder_name));
-    }
+    // Create the folder if it doesn't exist, which may race with other threads doing the same
+    fs::create_dir_all(&folder_path).expect(&format!("Failed to create folder {}", folder_name));
 
     folder_path.to_path_buf()
 }
@@ -23,4 +27,199 @@ pub fn rename_zkif_file(
     let new_path = workspace.join(new_file_name);
 
     fs::rename(original_path, new_path)
-}
\ No newline at end of file
+}
+
+/// Constraints per zkif message of an exported constraint system, like the exporters of the
+/// backends. This only bounds the size of each message: the backends still read all of them into
+/// one reader and synthesize the whole constraint system in memory.
+pub const CONSTRAINTS_PER_MESSAGE: usize = 100000;
+
+/// Collects the constraint files `constraints_{i}.zkif` of a workspace into `{new_name}.zkif`,
+/// as a sequence of messages of at most `constraints_per_message` constraints each.
+pub fn chunk_zkif_constraints(
+    new_name: &str,
+    workspace: &Path,
+    constraints_per_message: usize,
+) -> zkinterface::Result<()> {
+    let mut file = BufWriter::new(File::create(workspace.join(format!("{}.zkif", new_name)))?);
+    let mut chunk = ConstraintSystem::default();
+    let mut chunks_count = 0;
+
+    for i in 0.. {
+        let path = workspace.join(format!("constraints_{}.zkif", i));
+        if !path.exists() {
+            break;
+        }
+        // The file is mapped rather than read, and only the message being split is decoded.
+        // Safety: the exporter has finished writing the file, which is private to this workspace.
+        let map = unsafe { Mmap::map(&File::open(&path)?)? };
+        let mut messages = &map[..];
+        while messages.len() >= 4 {
+            let size = 4 + u32::from_le_bytes([messages[0], messages[1], messages[2], messages[3]]) as usize;
+            let message = messages.get(..size).ok_or("truncated zkif message")?;
+            for constraint in ConstraintSystem::try_from(message)?.constraints {
+                chunk.constraints.push(constraint);
+                if chunk.constraints.len() >= constraints_per_message {
+                    chunk.write_into(&mut file)?;
+                    chunk.constraints.clear();
+                    chunks_count += 1;
+                }
+            }
+            messages = &messages[size..];
+        }
+        drop(map);
+        fs::remove_file(&path)?;
+    }
+
+    if !chunk.constraints.is_empty() || chunks_count == 0 {
+        chunk.write_into(&mut file)?;
+    }
+    file.flush()?;
+    Ok(())
+}
+
+// zkif messages are size-prefixed flatbuffers, so a buffer may hold several of them one after
+// the other, as do the chunked constraint systems. Each message is pushed on its own, and the
+// reader keeps its own copy of it.
+pub fn push_zkif_messages(reader: &mut Reader, mut buf: &[u8]) -> zkinterface::Result<()> {
+    while buf.len() >= 4 {
+        let size = 4 + u32::from_le_bytes([buf[0], buf[1], buf[2], buf[3]]) as usize;
+        let message = buf.get(..size).ok_or("truncated zkif message")?;
+        reader.push_message(message.to_vec())?;
+        buf = &buf[size..];
+    }
+    Ok(())
+}
+
+/// The size of a compiled circuit, as read back from its zkif header and constraints.
+pub struct ZkifStats {
+    pub constraints: usize,
+    pub public_inputs: usize,
+    pub private_variables: usize,
+    /// Non-zero terms in the A, B and C linear combinations, including constants.
+    pub terms: [usize; 3],
+}
+
+pub fn zkif_stats(header: &[u8], constraints: &[u8]) -> zkinterface::Result<ZkifStats> {
+    let mut reader = Reader::new();
+    push_zkif_messages(&mut reader, header)?;
+    push_zkif_messages(&mut reader, constraints)?;
+
+    let mut stats = ZkifStats {
+        constraints: 0,
+        public_inputs: reader.instance_variables().map_or(0, |vars| vars.len()),
+        private_variables: reader.private_variables().map_or(0, |vars| vars.len()),
+        terms: [0; 3],
+    };
+    for constraint in reader.iter_constraints() {
+        stats.constraints += 1;
+        stats.terms[0] += constraint.a.len();
+        stats.terms[1] += constraint.b.len();
+        stats.terms[2] += constraint.c.len();
+    }
+    Ok(stats)
+}
+
+static SCRATCH_COUNTER: AtomicUsize = AtomicUsize::new(0);
+
+/// `{prefix}_{pid}_{n}`, a name that no other call in this or another process uses.
+pub fn scratch_name(prefix: &str) -> String {
+    let n = SCRATCH_COUNTER.fetch_add(1, Ordering::Relaxed);
+    format!("{}_{}_{}", prefix, std::process::id(), n)
+}
+
+/// Writes `data` to a private file next to `path` and renames it into place, so that
+/// concurrent readers only ever see complete files.
+pub fn write_atomic(path: &Path, data: &[u8]) -> Result<(), std::io::Error> {
+    let file_name = path.file_name().and_then(|name| name.to_str()).unwrap_or("");
+    let tmp_path = path.with_file_name(format!("{}.tmp", scratch_name(&format!(".{}", file_name))));
+
+    let result = fs::write(&tmp_path, data).and_then(|_| fs::rename(&tmp_path, path));
+    if result.is_err() {
+        let _ = fs::remove_file(&tmp_path);
+    }
+    result
+}
+
+/// A private directory for the ZKPyC exporters, which can only write to files.
+/// It is removed together with its contents when dropped.
+pub struct ScratchDir {
+    path: PathBuf,
+}
+
+impl ScratchDir {
+    pub fn new() -> Result<Self, std::io::Error> {
+        Self::new_in(&std::env::temp_dir(), "zkpytoolkit")
+    }
+
+    /// A scratch directory in shared memory where the system has it, for the small files of a
+    /// single statement that only pass through the file system because ZKPyC reads and writes
+    /// nothing else.
+    pub fn in_shared_memory() -> Result<Self, std::io::Error> {
+        let shm = Path::new("/dev/shm");
+        if shm.is_dir() {
+            if let Ok(scratch) = Self::new_in(shm, "zkpytoolkit") {
+                return Ok(scratch);
+            }
+        }
+        Self::new()
+    }
+
+    /// A scratch directory `{prefix}_{pid}_{n}` in `folder`, for files that are renamed into a
+    /// destination on the same filesystem instead of being copied.
+    pub fn new_in(folder: &Path, prefix: &str) -> Result<Self, std::io::Error> {
+        let path = folder.join(scratch_name(prefix));
+        fs::create_dir_all(&path)?;
+        Ok(ScratchDir { path })
+    }
+
+    pub fn path(&self) -> &Path {
+        &self.path
+    }
+}
+
+impl Drop for ScratchDir {
+    fn drop(&mut self) {
+        let _ = fs::remove_dir_all(&self.path);
+    }
+}
+
+/// zkif messages (a header, witness or constraints), a CRS or prover or verifier data, either
+/// as bytes or as the path of a file. Bytes are borrowed from the Python object and files are memory-mapped, so that the
+/// contents are never copied on the way in, and a key file is shared through the page cache by
+/// all processes loading it.
+#[derive(FromPyObject)]
+pub enum Buffer<'a> {
+    Bytes(&'a PyBytes),
+    Path(PathBuf),
+}
+
+#[derive(Clone)]
+pub enum BufferSource<'a> {
+    Bytes(&'a [u8]),
+    Path(PathBuf),
+}
+
+impl<'a> Buffer<'a> {
+    pub fn as_source(&self) -> BufferSource<'a> {
+        match self {
+            Buffer::Bytes(bytes) => BufferSource::Bytes(bytes.as_bytes()),
+            Buffer::Path(path) => BufferSource::Path(path.clone()),
+        }
+    }
+}
+
+impl<'a> BufferSource<'a> {
+    pub fn with_bytes<T>(&self, f: impl FnOnce(&[u8]) -> PyResult<T>) -> PyResult<T> {
+        match self {
+            BufferSource::Bytes(bytes) => f(bytes),
+            BufferSource::Path(path) => {
+                let file = File::open(path)?;
+                // Safety: the files under cache_id_{id} are only ever replaced by renaming a new
+                // file into place, never modified in place, so the mapping stays valid while in use.
+                let map = unsafe { Mmap::map(&file)? };
+                f(&map)
+            }
+        }
+    }
+}
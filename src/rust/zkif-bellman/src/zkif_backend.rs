@@ -7,7 +7,9 @@ use bellman::{
         prepare_verifying_key,
         verify_proof,
         Parameters,
+        PreparedVerifyingKey,
         Proof,
+        VerifyingKey,
     },
     SynthesisError,
     Variable,
@@ -17,12 +19,22 @@ use bellman::{
 use rand;
 use std::collections::HashMap;
 use std::fs::File;
+use std::io::{self, BufReader, BufWriter, Read, Write};
 use std::path::Path;
 use super::import::{enforce, read_scalar};
 pub use zkinterface::Reader;
 use std::error::Error;
-use ff::PrimeField;
-use bls12_381::{Bls12, Scalar as Bls12Scalar};
+use ff::{Field, PrimeField};
+use bls12_381::{
+    Bls12,
+    Scalar as Bls12Scalar,
+    G1Affine,
+    G1Projective,
+    G2Affine,
+    G2Prepared,
+    Gt,
+    multi_miller_loop,
+};
 
 const DEFAULT_KEY_PATH: &str = "bellman-pk";
 const DEFAULT_PROOF_PATH: &str = "bellman-proof";
@@ -130,6 +142,22 @@ pub fn setup(
 {
     let key_path = workspace.join(key_name);
 
+    let params = generate_parameters(reader)?;
+
+    // Store params.
+    let mut file = BufWriter::new(File::create(&key_path)?);
+    params.write(&mut file)?;
+    file.flush()?;
+    // eprintln!("Written parameters into {}", key_path.display());
+
+    Ok(())
+}
+
+/// Generate the Groth16 parameters of the circuit described by the messages.
+pub fn generate_parameters(
+    reader: &Reader,
+) -> Result<Parameters<Bls12>, Box<dyn Error>>
+{
     let circuit = ZKIFCircuit { reader };
 
     let mut rng = rand::thread_rng();
@@ -138,12 +166,7 @@ pub fn setup(
         &mut rng,
     )?;
 
-    // Store params.
-    let file = File::create(&key_path)?;
-    params.write(file)?;
-    // eprintln!("Written parameters into {}", key_path.display());
-
-    Ok(())
+    Ok(params)
 }
 
 pub fn prove(
@@ -156,28 +179,40 @@ pub fn prove(
     let key_path = workspace.join(key_name);
     let proof_path = workspace.join(proof_name);
 
-    let circuit = ZKIFCircuit { reader };
-
     // Load params.
     let params = {
         // eprintln!("Reading parameters from {}", key_path.display());
-        let mut file = File::open(&key_path)?;
+        let mut file = BufReader::new(File::open(&key_path)?);
         Parameters::<Bls12>::read(&mut file, false)?
     };
 
+    let proof = create_proof(reader, &params)?;
+
+    // Store proof.
+    let mut file = BufWriter::new(File::create(&proof_path)?);
+    proof.write(&mut file)?;
+    file.flush()?;
+    // eprintln!("Written proof into {}", proof_path.display());
+
+    Ok(())
+}
+
+/// Create a proof for the circuit and witness in the messages, using already loaded parameters.
+pub fn create_proof(
+    reader: &Reader,
+    params: &Parameters<Bls12>,
+) -> Result<Proof<Bls12>, Box<dyn Error>>
+{
+    let circuit = ZKIFCircuit { reader };
+
     let mut rng = rand::thread_rng();
     let proof = create_random_proof(
         circuit,
-        &params,
+        params,
         &mut rng,
     )?;
 
-    // Store proof.
-    let file = File::create(&proof_path)?;
-    proof.write(file)?;
-    // eprintln!("Written proof into {}", proof_path.display());
-
-    Ok(())
+    Ok(proof)
 }
 
 pub fn verify(
@@ -191,28 +226,28 @@ pub fn verify(
 
     let pvk = {
         // eprintln!("Reading parameters from {}", key_path.display());
-        let mut file = File::open(&key_path)?;
+        let mut file = BufReader::new(File::open(&key_path)?);
         let params = Parameters::<Bls12>::read(&mut file, false)?;
         prepare_verifying_key::<Bls12>(&params.vk)
     };
 
-    let public_inputs: Vec<Bls12Scalar> = {
-        match reader.instance_variables() {
-            None => Vec::new(),
-            Some(instance_variables) => {
-                instance_variables.iter().map(|var|
-                    read_scalar(var.value)
-                ).collect()
-            }
-        }
-    };
-
     let proof = {
         // eprintln!("Reading proof from {}", proof_path.display());
         let mut file = File::open(&proof_path)?;
         Proof::read(&mut file).unwrap()
     };
-    let res = verify_proof(&pvk, &proof, &public_inputs);
+
+    verify_proof_with_key(reader, &pvk, &proof)
+}
+
+/// Verify a proof against the public inputs in the messages, using an already prepared verifying key.
+pub fn verify_proof_with_key(
+    reader: &Reader,
+    pvk: &PreparedVerifyingKey<Bls12>,
+    proof: &Proof<Bls12>,
+) -> Result<bool, Box<dyn Error>> {
+    let public_inputs = read_public_inputs(reader);
+    let res = verify_proof(pvk, proof, &public_inputs);
 
     match res {
         Ok(_) => Ok(true),
@@ -220,6 +255,111 @@ pub fn verify(
     }
 }
 
+fn read_g1<R: Read>(reader: &mut R, checked: bool) -> io::Result<G1Affine> {
+    let mut repr = [0u8; 96];
+    reader.read_exact(&mut repr)?;
+    let point = if checked { G1Affine::from_uncompressed(&repr) } else { G1Affine::from_uncompressed_unchecked(&repr) };
+    if bool::from(point.is_none()) {
+        return Err(io::Error::new(io::ErrorKind::InvalidData, "invalid G1 point"));
+    }
+    Ok(point.unwrap())
+}
+
+fn read_g2<R: Read>(reader: &mut R, checked: bool) -> io::Result<G2Affine> {
+    let mut repr = [0u8; 192];
+    reader.read_exact(&mut repr)?;
+    let point = if checked { G2Affine::from_uncompressed(&repr) } else { G2Affine::from_uncompressed_unchecked(&repr) };
+    if bool::from(point.is_none()) {
+        return Err(io::Error::new(io::ErrorKind::InvalidData, "invalid G2 point"));
+    }
+    Ok(point.unwrap())
+}
+
+/// Read a verifying key in the format of `VerifyingKey::write`, which is also how serialized
+/// `Parameters` begin, so that the verifying key of a CRS is read without parsing the rest.
+/// Unless `checked`, the points are not validated to lie in the prime order subgroups, which
+/// is only sound for keys from a trusted source.
+pub fn read_verifying_key<R: Read>(mut reader: R, checked: bool) -> io::Result<VerifyingKey<Bls12>> {
+    let alpha_g1 = read_g1(&mut reader, checked)?;
+    let beta_g1 = read_g1(&mut reader, checked)?;
+    let beta_g2 = read_g2(&mut reader, checked)?;
+    let gamma_g2 = read_g2(&mut reader, checked)?;
+    let delta_g1 = read_g1(&mut reader, checked)?;
+    let delta_g2 = read_g2(&mut reader, checked)?;
+
+    let mut ic_len = [0u8; 4];
+    reader.read_exact(&mut ic_len)?;
+    let ic = (0..u32::from_be_bytes(ic_len))
+        .map(|_| read_g1(&mut reader, checked))
+        .collect::<io::Result<Vec<_>>>()?;
+
+    Ok(VerifyingKey { alpha_g1, beta_g1, beta_g2, gamma_g2, delta_g1, delta_g2, ic })
+}
+
+/// Verify several proofs of the same circuit at once.
+///
+/// Each instance is a reader holding the public inputs and a proof. The verification
+/// equations are combined with random weights `r_i`, so that checking
+///
+///   prod_i e(r_i A_i, B_i) = e(sum_i r_i alpha, beta) e(sum_i r_i acc_i, gamma) e(sum_i r_i C_i, delta)
+///
+/// needs one Miller loop per proof plus three, and a single final exponentiation.
+/// Returns false if any of the proofs is invalid, without telling which one.
+pub fn batch_verify_proofs(
+    vk: &VerifyingKey<Bls12>,
+    instances: &[(&Reader, &Proof<Bls12>)],
+) -> Result<bool, Box<dyn Error>> {
+    let mut rng = rand::thread_rng();
+
+    let mut a_terms = Vec::with_capacity(instances.len());
+    let mut sum_r = Bls12Scalar::zero();
+    let mut sum_acc = G1Projective::identity();
+    let mut sum_c = G1Projective::identity();
+
+    for (reader, proof) in instances {
+        let public_inputs = read_public_inputs(reader);
+        if public_inputs.len() + 1 != vk.ic.len() {
+            return Ok(false);
+        }
+
+        let mut acc = G1Projective::from(vk.ic[0]);
+        for (input, ic) in public_inputs.iter().zip(vk.ic.iter().skip(1)) {
+            acc += G1Projective::from(*ic) * input;
+        }
+
+        let r = Bls12Scalar::random(&mut rng);
+        a_terms.push((G1Affine::from(G1Projective::from(proof.a) * r), G2Prepared::from(proof.b)));
+        sum_r += r;
+        sum_acc += acc * r;
+        sum_c += G1Projective::from(proof.c) * r;
+    }
+
+    let alpha = G1Affine::from(-(G1Projective::from(vk.alpha_g1) * sum_r));
+    let acc = G1Affine::from(-sum_acc);
+    let c = G1Affine::from(-sum_c);
+    let beta = G2Prepared::from(vk.beta_g2);
+    let gamma = G2Prepared::from(vk.gamma_g2);
+    let delta = G2Prepared::from(vk.delta_g2);
+
+    let mut terms: Vec<(&G1Affine, &G2Prepared)> = a_terms.iter().map(|(a, b)| (a, b)).collect();
+    terms.push((&alpha, &beta));
+    terms.push((&acc, &gamma));
+    terms.push((&c, &delta));
+
+    Ok(multi_miller_loop(&terms).final_exponentiation() == Gt::identity())
+}
+
+fn read_public_inputs(reader: &Reader) -> Vec<Bls12Scalar> {
+    match reader.instance_variables() {
+        None => Vec::new(),
+        Some(instance_variables) => {
+            instance_variables.iter().map(|var|
+                read_scalar(var.value)
+            ).collect()
+        }
+    }
+}
+
 
 #[test]
 fn test_zkif_backend() -> Result<(), Box<dyn Error>> {
@@ -241,3 +381,21 @@ fn test_zkif_backend() -> Result<(), Box<dyn Error>> {
 
     Ok(())
 }
+
+#[test]
+fn test_read_verifying_key() -> Result<(), Box<dyn Error>> {
+    let mut reader = Reader::new();
+    reader.read_file(Path::new("src/tests/example.zkif"))?;
+
+    let params = generate_parameters(&reader)?;
+    let mut params_ser = Vec::new();
+    params.write(&mut params_ser)?;
+
+    // The verifying key is read from the beginning of the serialized parameters
+    for &checked in &[true, false] {
+        let vk = read_verifying_key(&params_ser[..], checked)?;
+        assert!(vk == params.vk);
+    }
+
+    Ok(())
+}
@@ -12,6 +12,6 @@ pub use self::constraint_system::ConstraintSystem;
 pub use self::linear_combination::{LinearCombination, Variable};
 pub use self::proof::R1CSProof;
 pub use self::prover::Prover;
-pub use self::verifier::Verifier;
+pub use self::verifier::{batch_verify, Verifier};
 
 pub use errors::R1CSError;
@@ -246,6 +246,42 @@ impl<'a, 'b> VerifierCS<'a, 'b> {
 
     /// Consume this `VerifierCS` and attempt to verify the supplied `proof`.
     pub fn verify(mut self, proof: &R1CSProof) -> Result<(), R1CSError> {
+        let terms = self.verification_terms(proof)?;
+        let gens = self.bp_gens.share(0);
+
+        use std::iter;
+
+        let mega_check = RistrettoPoint::optional_multiscalar_mul(
+            terms
+                .dynamic_scalars
+                .into_iter()
+                .chain(iter::once(terms.B_scalar)) // B
+                .chain(iter::once(terms.B_blinding_scalar)) // B_blinding
+                .chain(terms.g_scalars) // G
+                .chain(terms.h_scalars), // H
+            terms
+                .dynamic_points
+                .into_iter()
+                .chain(iter::once(Some(self.pc_gens.B)))
+                .chain(iter::once(Some(self.pc_gens.B_blinding)))
+                .chain(gens.G(terms.padded_n).map(|&G_i| Some(G_i)))
+                .chain(gens.H(terms.padded_n).map(|&H_i| Some(H_i))),
+        )
+        .ok_or_else(|| R1CSError::VerificationError)?;
+
+        use curve25519_dalek::traits::IsIdentity;
+
+        if !mega_check.is_identity() {
+            return Err(R1CSError::VerificationError);
+        }
+
+        Ok(())
+    }
+
+    /// Run the verifier side of the protocol on `proof` and return the
+    /// scalars and points of the resulting verification equation, without
+    /// evaluating it.
+    fn verification_terms(&mut self, proof: &R1CSProof) -> Result<VerificationTerms, R1CSError> {
         // If the number of multiplications is not 0 or a power of 2, then pad the circuit.
         let n = self.num_vars;
         let padded_n = self.num_vars.next_power_of_two();
@@ -258,8 +294,6 @@ impl<'a, 'b> VerifierCS<'a, 'b> {
         if self.bp_gens.gens_capacity < padded_n {
             return Err(R1CSError::InvalidGeneratorsLength);
         }
-        // We are performing a single-party circuit proof, so party index is 0.
-        let gens = self.bp_gens.share(0);
 
         self.transcript.append_point(b"A_I", &proof.A_I);
         self.transcript.append_point(b"A_O", &proof.A_O);
@@ -312,7 +346,8 @@ impl<'a, 'b> VerifierCS<'a, 'b> {
         let g_scalars = yneg_wR
             .iter()
             .zip(s.iter().take(padded_n))
-            .map(|(yneg_wRi, s_i)| x * yneg_wRi - a * s_i);
+            .map(|(yneg_wRi, s_i)| x * yneg_wRi - a * s_i)
+            .collect();
 
         let h_scalars = y_inv_vec
             .iter()
@@ -321,7 +356,8 @@ impl<'a, 'b> VerifierCS<'a, 'b> {
             .zip(wO.into_iter().chain(iter::repeat(Scalar::zero()).take(pad)))
             .map(|(((y_inv_i, s_i_inv), wLi), wOi)| {
                 y_inv_i * (x * wLi + wOi - b * s_i_inv) - Scalar::one()
-            });
+            })
+            .collect();
 
         // Create a `TranscriptRng` from the transcript. The verifier
         // has no witness data to commit, so this just mixes external
@@ -338,40 +374,136 @@ impl<'a, 'b> VerifierCS<'a, 'b> {
         let T_scalars = [r * x, rxx * x, rxx * xx, rxx * xxx, rxx * xx * xx];
         let T_points = [proof.T_1, proof.T_3, proof.T_4, proof.T_5, proof.T_6];
 
-        let mega_check = RistrettoPoint::optional_multiscalar_mul(
-            iter::once(x) // A_I
-                .chain(iter::once(xx)) // A_O
-                .chain(iter::once(xxx)) // S
-                .chain(wV.iter().map(|wVi| wVi * rxx)) // V
-                .chain(T_scalars.iter().cloned()) // T_points
-                .chain(iter::once(
-                    w * (proof.t_x - a * b) + r * (xx * (wc + delta) - proof.t_x),
-                )) // B
-                .chain(iter::once(-proof.e_blinding - r * proof.t_x_blinding)) // B_blinding
-                .chain(g_scalars) // G
-                .chain(h_scalars) // H
-                .chain(u_sq.iter().cloned()) // ipp_proof.L_vec
-                .chain(u_inv_sq.iter().cloned()), // ipp_proof.R_vec
-            iter::once(proof.A_I.decompress())
-                .chain(iter::once(proof.A_O.decompress()))
-                .chain(iter::once(proof.S.decompress()))
-                .chain(self.V.iter().map(|V_i| V_i.decompress()))
-                .chain(T_points.iter().map(|T_i| T_i.decompress()))
-                .chain(iter::once(Some(self.pc_gens.B)))
-                .chain(iter::once(Some(self.pc_gens.B_blinding)))
-                .chain(gens.G(padded_n).map(|&G_i| Some(G_i)))
-                .chain(gens.H(padded_n).map(|&H_i| Some(H_i)))
-                .chain(proof.ipp_proof.L_vec.iter().map(|L_i| L_i.decompress()))
-                .chain(proof.ipp_proof.R_vec.iter().map(|R_i| R_i.decompress())),
-        )
-        .ok_or_else(|| R1CSError::VerificationError)?;
+        let dynamic_scalars = iter::once(x) // A_I
+            .chain(iter::once(xx)) // A_O
+            .chain(iter::once(xxx)) // S
+            .chain(wV.iter().map(|wVi| wVi * rxx)) // V
+            .chain(T_scalars.iter().cloned()) // T_points
+            .chain(u_sq.iter().cloned()) // ipp_proof.L_vec
+            .chain(u_inv_sq.iter().cloned()) // ipp_proof.R_vec
+            .collect();
+
+        let dynamic_points = iter::once(proof.A_I.decompress())
+            .chain(iter::once(proof.A_O.decompress()))
+            .chain(iter::once(proof.S.decompress()))
+            .chain(self.V.iter().map(|V_i| V_i.decompress()))
+            .chain(T_points.iter().map(|T_i| T_i.decompress()))
+            .chain(proof.ipp_proof.L_vec.iter().map(|L_i| L_i.decompress()))
+            .chain(proof.ipp_proof.R_vec.iter().map(|R_i| R_i.decompress()))
+            .collect();
+
+        Ok(VerificationTerms {
+            padded_n,
+            B_scalar: w * (proof.t_x - a * b) + r * (xx * (wc + delta) - proof.t_x),
+            B_blinding_scalar: -proof.e_blinding - r * proof.t_x_blinding,
+            g_scalars,
+            h_scalars,
+            dynamic_scalars,
+            dynamic_points,
+        })
+    }
+}
 
-        use curve25519_dalek::traits::IsIdentity;
+/// The verification equation of a single proof, split into the terms
+/// over the generators shared by all proofs and the proof-specific ones.
+struct VerificationTerms {
+    /// Number of `G` and `H` generators used by the proof.
+    padded_n: usize,
+    B_scalar: Scalar,
+    B_blinding_scalar: Scalar,
+    g_scalars: Vec<Scalar>,
+    h_scalars: Vec<Scalar>,
+    /// Scalars for `A_I`, `A_O`, `S`, `V`, the `T` points and the IPP `L` and `R` points.
+    dynamic_scalars: Vec<Scalar>,
+    dynamic_points: Vec<Option<RistrettoPoint>>,
+}
 
-        if !mega_check.is_identity() {
-            return Err(R1CSError::VerificationError);
+/// Verify many proofs with a single multiscalar multiplication.
+///
+/// Each instance pairs a `VerifierCS`, with all of its constraints
+/// added, and the proof to check against it. The verification equation
+/// of every proof is scaled by a random weight and all equations are
+/// summed, so that the scalars for the `B`, `B_blinding`, `G` and `H`
+/// generators are merged across proofs. The combined check passes only
+/// if, with overwhelming probability, every proof is valid; it does not
+/// tell which proof failed.
+///
+/// All verifiers must use the same [`PedersenGens`] and
+/// [`BulletproofGens`] derived from the same label, as is the case for
+/// the default constructors.
+pub fn batch_verify<'a, 'b, 'p>(
+    instances: Vec<(VerifierCS<'a, 'b>, &'p R1CSProof)>,
+) -> Result<(), R1CSError> {
+    use rand::thread_rng;
+    use std::iter;
+
+    let mut rng = thread_rng();
+
+    let mut bp_gens: Option<&BulletproofGens> = None;
+    let mut pc_gens: Option<&PedersenGens> = None;
+    let mut padded_n = 0;
+    let mut B_scalar = Scalar::zero();
+    let mut B_blinding_scalar = Scalar::zero();
+    let mut g_scalars: Vec<Scalar> = Vec::new();
+    let mut h_scalars: Vec<Scalar> = Vec::new();
+    let mut dynamic_scalars: Vec<Scalar> = Vec::new();
+    let mut dynamic_points: Vec<Option<RistrettoPoint>> = Vec::new();
+
+    for (mut cs, proof) in instances {
+        let terms = cs.verification_terms(proof)?;
+        let c = Scalar::random(&mut rng);
+
+        // Any verifier with enough capacity can supply the shared generators,
+        // since generators with the same label share their prefix.
+        if terms.padded_n >= padded_n {
+            padded_n = terms.padded_n;
+            bp_gens = Some(cs.bp_gens);
         }
+        pc_gens = pc_gens.or(Some(cs.pc_gens));
 
-        Ok(())
+        g_scalars.resize(padded_n, Scalar::zero());
+        h_scalars.resize(padded_n, Scalar::zero());
+
+        B_scalar += c * terms.B_scalar;
+        B_blinding_scalar += c * terms.B_blinding_scalar;
+        for (acc, g_i) in g_scalars.iter_mut().zip(terms.g_scalars) {
+            *acc += c * g_i;
+        }
+        for (acc, h_i) in h_scalars.iter_mut().zip(terms.h_scalars) {
+            *acc += c * h_i;
+        }
+        dynamic_scalars.extend(terms.dynamic_scalars.into_iter().map(|s_i| c * s_i));
+        dynamic_points.extend(terms.dynamic_points);
     }
+
+    let (bp_gens, pc_gens) = match (bp_gens, pc_gens) {
+        (Some(bp_gens), Some(pc_gens)) => (bp_gens, pc_gens),
+        // Nothing to verify.
+        _ => return Ok(()),
+    };
+    let gens = bp_gens.share(0);
+
+    let mega_check = RistrettoPoint::optional_multiscalar_mul(
+        dynamic_scalars
+            .into_iter()
+            .chain(iter::once(B_scalar)) // B
+            .chain(iter::once(B_blinding_scalar)) // B_blinding
+            .chain(g_scalars) // G
+            .chain(h_scalars), // H
+        dynamic_points
+            .into_iter()
+            .chain(iter::once(Some(pc_gens.B)))
+            .chain(iter::once(Some(pc_gens.B_blinding)))
+            .chain(gens.G(padded_n).map(|&G_i| Some(G_i)))
+            .chain(gens.H(padded_n).map(|&H_i| Some(H_i))),
+    )
+    .ok_or_else(|| R1CSError::VerificationError)?;
+
+    use curve25519_dalek::traits::IsIdentity;
+
+    if !mega_check.is_identity() {
+        return Err(R1CSError::VerificationError);
+    }
+
+    Ok(())
 }
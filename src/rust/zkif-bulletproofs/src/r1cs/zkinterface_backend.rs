@@ -18,6 +18,7 @@ use r1cs::Prover;
 use r1cs::R1CSProof;
 use r1cs::Variable;
 use r1cs::Verifier;
+use r1cs::batch_verify;
 use std::cmp::min;
 use std::collections::HashMap;
 use BulletproofGens;
@@ -28,14 +29,24 @@ use PedersenGens;
 /// - `R1CSConstraints` contains an R1CS which we convert to an arithmetic circuit on the fly.
 /// - `Witness` contains the values to assign to all variables.
 pub fn prove(messages: &Reader, generators_count: usize) -> Result<R1CSProof> {
-    // Common
     let pc_gens = PedersenGens::default();
     let bp_gens = BulletproofGens::new(generators_count, 1);
+    prove_with_gens(messages, &bp_gens, &pc_gens)
+}
+
+/// Same as `prove`, with generators provided by the caller, so that they can be
+/// reused across proofs. `bp_gens` must have a capacity of at least the number of gates.
+pub fn prove_with_gens(
+    messages: &Reader,
+    bp_gens: &BulletproofGens,
+    pc_gens: &PedersenGens,
+) -> Result<R1CSProof> {
+    // Common
     let mut transcript = Transcript::new(b"zkInterfaceGadget");
     // /Common
 
     // 1. Create a prover
-    let prover = Prover::new(&bp_gens, &pc_gens, &mut transcript);
+    let prover = Prover::new(bp_gens, pc_gens, &mut transcript);
 
     // 2. There are no high-level variables.
 
@@ -54,21 +65,43 @@ pub fn prove(messages: &Reader, generators_count: usize) -> Result<R1CSProof> {
 /// - `Circuit` contains the public inputs.
 /// - `R1CSConstraints` contains an R1CS which we convert to an arithmetic circuit on the fly.
 pub fn verify(messages: &Reader, proof: &R1CSProof, generators_count: usize) -> Result<bool> {
-    // Common
     let pc_gens = PedersenGens::default();
     let bp_gens = BulletproofGens::new(generators_count, 1);
+    verify_with_gens(messages, proof, &bp_gens, &pc_gens)
+}
+
+/// Same as `verify`, with generators provided by the caller.
+pub fn verify_with_gens(
+    messages: &Reader,
+    proof: &R1CSProof,
+    bp_gens: &BulletproofGens,
+    pc_gens: &PedersenGens,
+) -> Result<bool> {
+    verify_circuit_with_gens(messages, messages, proof, bp_gens, pc_gens)
+}
+
+/// Same as `verify_with_gens`, with the `Circuit` message and the `R1CSConstraints` in separate
+/// readers, so that statements of the same circuit can share its constraints.
+pub fn verify_circuit_with_gens(
+    circuit: &Reader,
+    constraints: &Reader,
+    proof: &R1CSProof,
+    bp_gens: &BulletproofGens,
+    pc_gens: &PedersenGens,
+) -> Result<bool> {
+    // Common
     let mut transcript = Transcript::new(b"zkInterfaceGadget");
     // /Common
 
     // 1. Create a verifier
-    let verifier = Verifier::new(&bp_gens, &pc_gens, &mut transcript);
+    let verifier = Verifier::new(bp_gens, pc_gens, &mut transcript);
 
     // 2. There are no high-level variables.
 
     // 3. Build a CS
     let mut cs = verifier.finalize_inputs();
 
-    gadget_from_messages(&mut cs, messages, false)?;
+    gadget_from_circuit(&mut cs, circuit, constraints, false)?;
 
     // 4. Verify the proof
     match cs.verify(&proof) {
@@ -77,17 +110,100 @@ pub fn verify(messages: &Reader, proof: &R1CSProof, generators_count: usize) ->
     }
 }
 
+/// Verify many proofs of the same circuit at once, using a single
+/// multiscalar multiplication for all of them.
+/// Each instance pairs the `Circuit` and `R1CSConstraints` messages with a proof.
+/// Returns `false` if any of the proofs is invalid.
+pub fn verify_batch(instances: &[(&Reader, &R1CSProof)], generators_count: usize) -> Result<bool> {
+    let pc_gens = PedersenGens::default();
+    let bp_gens = BulletproofGens::new(generators_count, 1);
+    verify_batch_with_gens(instances, &bp_gens, &pc_gens)
+}
+
+/// Same as `verify_batch`, with generators provided by the caller.
+pub fn verify_batch_with_gens(
+    instances: &[(&Reader, &R1CSProof)],
+    bp_gens: &BulletproofGens,
+    pc_gens: &PedersenGens,
+) -> Result<bool> {
+    let instances = instances
+        .iter()
+        .map(|(messages, proof)| (*messages, *messages, *proof))
+        .collect::<Vec<_>>();
+    batch_verify_circuits(&instances, bp_gens, pc_gens)
+}
+
+/// Same as `verify_batch_with_gens`, for instances that only hold the `Circuit` message,
+/// and share the `R1CSConstraints` of `constraints`.
+pub fn verify_batch_shared_with_gens(
+    instances: &[(&Reader, &R1CSProof)],
+    constraints: &Reader,
+    bp_gens: &BulletproofGens,
+    pc_gens: &PedersenGens,
+) -> Result<bool> {
+    let instances = instances
+        .iter()
+        .map(|(circuit, proof)| (*circuit, constraints, *proof))
+        .collect::<Vec<_>>();
+    batch_verify_circuits(&instances, bp_gens, pc_gens)
+}
+
+fn batch_verify_circuits(
+    instances: &[(&Reader, &Reader, &R1CSProof)],
+    bp_gens: &BulletproofGens,
+    pc_gens: &PedersenGens,
+) -> Result<bool> {
+    // Common
+    let mut transcripts = instances
+        .iter()
+        .map(|_| Transcript::new(b"zkInterfaceGadget"))
+        .collect::<Vec<_>>();
+    // /Common
+
+    let mut verifiers = Vec::with_capacity(instances.len());
+    for (transcript, (circuit, constraints, proof)) in transcripts.iter_mut().zip(instances) {
+        // 1. Create a verifier
+        let verifier = Verifier::new(bp_gens, pc_gens, transcript);
+
+        // 2. There are no high-level variables.
+
+        // 3. Build a CS
+        let mut cs = verifier.finalize_inputs();
+
+        gadget_from_circuit(&mut cs, circuit, constraints, false)?;
+
+        verifiers.push((cs, *proof));
+    }
+
+    // 4. Verify all proofs together
+    match batch_verify(verifiers) {
+        Ok(_) => Ok(true),
+        Err(_) => Ok(false),
+    }
+}
+
 /// A gadget using a circuit in zkInterface messages.
 pub fn gadget_from_messages<CS: ConstraintSystem>(
     cs: &mut CS,
     messages: &Reader,
     prover: bool,
 ) -> Result<()> {
-    let public_vars = messages
+    gadget_from_circuit(cs, messages, messages, prover)
+}
+
+/// Same as `gadget_from_messages`, with the `Circuit` and `Witness` messages in `circuit`, and
+/// the `R1CSConstraints` in `constraints`.
+pub fn gadget_from_circuit<CS: ConstraintSystem>(
+    cs: &mut CS,
+    circuit: &Reader,
+    constraints: &Reader,
+    prover: bool,
+) -> Result<()> {
+    let public_vars = circuit
         .instance_variables()
         .ok_or("Missing Circuit.connections")?;
 
-    let private_vars = messages
+    let private_vars = circuit
         .private_variables()
         .ok_or("Missing Circuit.connections")?;
 
@@ -132,7 +248,7 @@ pub fn gadget_from_messages<CS: ConstraintSystem>(
     let mut gates_b = vec![];
     let mut gates_c = vec![];
 
-    for constraint in messages.iter_constraints() {
+    for constraint in constraints.iter_constraints() {
         let (gate_a, gate_b, gate_c) = cs
             .allocate(|| {
                 Ok((
@@ -173,7 +289,7 @@ pub fn gadget_from_messages<CS: ConstraintSystem>(
     // eprintln!();
 
     // Step 3: Add linear constraints into each wire of each gate.
-    for (i, constraint) in messages.iter_constraints().enumerate() {
+    for (i, constraint) in constraints.iter_constraints().enumerate() {
         // eprintln!("constraint {}:", i);
 
         let lc_a = convert_zkif_lc(&id_to_lc, &constraint.a)?;
@@ -284,4 +400,37 @@ fn test_zkinterface_backend() {
 
     // Verify using the circuit and the proof.
     verify(&verifier_messages, &proof, 128).unwrap();
+
+    // Verify several proofs of the same circuit in one batch.
+    let other_proof = prove(&prover_messages, 128).unwrap();
+    assert!(verify_batch(
+        &[(&verifier_messages, &proof), (&verifier_messages, &other_proof)],
+        128,
+    )
+    .unwrap());
+
+    // Or with the constraints shared by the statements.
+    let circuit_messages = {
+        let mut buf = Vec::<u8>::new();
+        examples::example_circuit_header().write_into(&mut buf).unwrap();
+        let mut msg = Reader::new();
+        msg.push_message(buf).unwrap();
+        msg
+    };
+    let constraints_messages = {
+        let mut buf = Vec::<u8>::new();
+        examples::example_constraints().write_into(&mut buf).unwrap();
+        let mut msg = Reader::new();
+        msg.push_message(buf).unwrap();
+        msg
+    };
+    let pc_gens = PedersenGens::default();
+    let bp_gens = BulletproofGens::new(128, 1);
+    assert!(verify_batch_shared_with_gens(
+        &[(&circuit_messages, &proof), (&circuit_messages, &other_proof)],
+        &constraints_messages,
+        &bp_gens,
+        &pc_gens,
+    )
+    .unwrap());
 }
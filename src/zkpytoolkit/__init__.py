@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import importlib
 import os
 from zkpytoolkit.__about__ import __author__, __version__
-from zkpytoolkit.zkp import ZKP
 
 current_directory = os.path.dirname(os.path.abspath(__file__))
 stdlib_path = os.path.dirname(current_directory)
@@ -10,8 +10,32 @@ stdlib_path = os.path.dirname(current_directory)
 # Export ZKPyC stdlib path for the compiler
 os.environ['ZKPYC_STDLIB_PATH'] = stdlib_path
 
+# The classes are imported on first access, as they load the Rust bindings,
+# so that the pure Python modules such as the types and the stdlib gadgets
+# can be imported without the extension
+_classes = {
+    "ZKP": "zkpytoolkit.zkp",
+    "AsyncZKP": "zkpytoolkit.async_zkp",
+    "ProverPool": "zkpytoolkit.prover_pool",
+}
+
+
+def __getattr__(name):
+    if name not in _classes:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module(_classes[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_classes})
+
+
 __all__ = [
     "__version__",
     "__author__",
-    "ZKP"
-]
\ No newline at end of file
+    "ZKP",
+    "AsyncZKP",
+    "ProverPool"
+]
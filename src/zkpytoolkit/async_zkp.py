@@ -0,0 +1,56 @@
+import asyncio
+import functools
+
+# Awaitable front-end over a ZKP instance for asyncio services. Every stage runs
+# on an executor (the loop's default one unless given), and the Rust bindings
+# release the GIL while compiling, setting up, proving and verifying, so that
+# many proofs can be in flight in one process. Proofs and verifications keep
+# their statements in memory and files are renamed into place once complete,
+# so that calls on the same function can also run concurrently in file mode.
+
+
+class AsyncZKP:
+    def __init__(self, zkp, executor=None):
+        self.zkp = zkp
+        self.executor = executor
+
+    async def _run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(method, *args, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+
+    async def compile(self, func, includes=None, global_vars=None, local_vars=None, opt_level=2, passes=None):
+        return await self._run(self.zkp.compile, func, includes, global_vars, local_vars, opt_level, passes)
+
+    async def profile(self, func, includes=None, global_vars=None, local_vars=None, opt_level=2, passes=None):
+        return await self._run(self.zkp.profile, func, includes, global_vars, local_vars, opt_level, passes)
+
+    async def generate_crs(self, func, return_path=False):
+        return await self._run(self.zkp.generate_crs, func, return_path)
+
+    async def get_crs(self, func, return_path=False):
+        return await self._run(self.zkp.get_crs, func, return_path)
+
+    async def get_vk(self, func, return_path=False):
+        return await self._run(self.zkp.get_vk, func, return_path)
+
+    async def load_crs(self, func, crs_bytes=None, trusted=None):
+        return await self._run(self.zkp.load_crs, func, crs_bytes, trusted)
+
+    async def load_vk(self, func, vk_bytes=None, trusted=None):
+        return await self._run(self.zkp.load_vk, func, vk_bytes, trusted)
+
+    async def check_witness(self, func, *args, **kwargs):
+        return await self._run(self.zkp.check_witness, func, *args, **kwargs)
+
+    async def prove(self, func, *args, **kwargs):
+        return await self._run(self.zkp.prove, func, *args, **kwargs)
+
+    async def verify(self, func, *args, return_value=None, proof=None, **kwargs):
+        return await self._run(self.zkp.verify, func, *args, return_value=return_value, proof=proof, **kwargs)
+
+    async def prove_batch(self, func, args_list, max_workers=None):
+        return await self._run(self.zkp.prove_batch, func, args_list, max_workers)
+
+    async def verify_batch(self, func, items):
+        return await self._run(self.zkp.verify_batch, func, items)
@@ -0,0 +1,131 @@
+import ast
+import hashlib
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+from zkpytoolkit.__about__ import __version__
+
+# Compiled circuits are stored under {path}/{key}/, where the key is a hash of
+# everything that determines the output of the compiler. The ZKPyC revision is
+# pinned in Cargo.toml, so the package version stands in for the compiler version.
+_ENTRY_FILES = ('header.zkif', 'constraints.zkif', 'prover_data.dat', 'verifier_data.dat')
+
+
+def _imported_modules(source, package=None):
+    # The absolute names of the modules imported by source. For `from a import
+    # b`, b may be a submodule, so both a and a.b are candidates
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            try:
+                base = importlib.util.resolve_name('.' * node.level + (node.module or ''), package)
+            except (ImportError, ValueError):
+                continue
+            names.add(base)
+            names.update('{}.{}'.format(base, alias.name) for alias in node.names if alias.name != '*')
+    return names
+
+
+def _module_file(name):
+    # The source file of a module, or None for the modules whose source is
+    # not hashed: the toolkit and its stdlib gadgets, which are covered by the
+    # version, and Python's own modules, which the compiler cannot include
+    top_level = name.partition('.')[0]
+    if top_level in ('zkpytoolkit', '__main__') or top_level in sys.stdlib_module_names:
+        return None
+    module = sys.modules.get(name)
+    path = getattr(module, '__file__', None)
+    if path is None:
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            return None
+        path = spec.origin if spec is not None else None
+    if path is None or not path.endswith('.py') or not os.path.isfile(path):
+        return None
+    return path
+
+
+def included_sources(code):
+    # The name and contents of every module the generated code includes,
+    # directly or through other included modules, sorted by name
+    sources = {}
+    pending = list(_imported_modules(code))
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        path = _module_file(name)
+        if path is None:
+            continue
+        with open(path, 'rb') as file:
+            sources[name] = file.read()
+        package = name if os.path.basename(path) == '__init__.py' else name.rpartition('.')[0]
+        try:
+            imported = _imported_modules(sources[name], package)
+        except SyntaxError:
+            continue
+        pending.extend(imported)
+    return sorted(sources.items())
+
+
+class CircuitCache:
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, func_name, code, modulus, module, options=None):
+        digest = hashlib.sha256()
+        for part in (__version__, str(modulus), module, func_name, code, repr(options)):
+            digest.update(part.encode())
+            digest.update(b'\0')
+        # The code only holds import statements for the included modules
+        for name, source in included_sources(code):
+            digest.update(name.encode())
+            digest.update(b'\0')
+            digest.update(hashlib.sha256(source).digest())
+        return digest.hexdigest()
+
+    def load(self, key):
+        entry_folder = os.path.join(self.path, key)
+        if not os.path.isdir(entry_folder):
+            return None
+        try:
+            with open(os.path.join(entry_folder, 'constraints_count'), 'r') as file:
+                constraints_count = int(file.read())
+            entry = [constraints_count]
+            for file_name in _ENTRY_FILES:
+                with open(os.path.join(entry_folder, file_name), 'rb') as file:
+                    entry.append(file.read())
+        except (OSError, ValueError):
+            # Treat incomplete entries as misses, they get overwritten on store
+            return None
+        return tuple(entry)
+
+    def store(self, key, constraints_count, header, constraints, prover_data, verifier_data):
+        os.makedirs(self.path, exist_ok=True)
+        entry_folder = os.path.join(self.path, key)
+
+        # Write the entry next to its final location and rename it into place,
+        # so that concurrent readers never see a partially written entry.
+        tmp_folder = tempfile.mkdtemp(prefix='.{}_'.format(key), dir=self.path)
+        try:
+            with open(os.path.join(tmp_folder, 'constraints_count'), 'w') as file:
+                file.write(str(constraints_count))
+            for file_name, data in zip(_ENTRY_FILES, (header, constraints, prover_data, verifier_data)):
+                with open(os.path.join(tmp_folder, file_name), 'wb') as file:
+                    file.write(data)
+            if os.path.isdir(entry_folder):
+                shutil.rmtree(entry_folder, ignore_errors=True)
+            os.replace(tmp_folder, entry_folder)
+        except OSError:
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+            # Another process may have stored the same entry first
+            if not os.path.isdir(entry_folder):
+                raise
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
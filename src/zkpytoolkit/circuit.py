@@ -0,0 +1,50 @@
+import os
+import tempfile
+import threading
+import weakref
+
+
+def _remove(path):
+    # The file may already be gone, e.g. with the temporary directory
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class Circuit:
+    # In-memory handle on a compiled function. It holds the zkif header and
+    # constraints together with the serialized prover and verifier data, so
+    # that proving and verifying never go through the cache_id_{id} folder.
+    # ZKPyC only reads the prover and verifier data from a file though, so
+    # each is written to a private temporary file once, on first use, which
+    # is removed together with the circuit.
+
+    def __init__(self, name, constraints_count, header, constraints, prover_data, verifier_data):
+        self.name = name
+        self.constraints_count = constraints_count
+        self.header = header
+        self.constraints = constraints
+        self.prover_data = prover_data
+        self.verifier_data = verifier_data
+        self.crs = None
+        self.vk = None
+        self.proof = None
+        self._data_files = {}
+        self._data_files_lock = threading.Lock()
+
+    def data_file(self, identifier):
+        # The path of the prover or verifier data
+        with self._data_files_lock:
+            path = self._data_files.get(identifier)
+            if path is None:
+                data = self.prover_data if identifier == 'prover' else self.verifier_data
+                fd, path = tempfile.mkstemp(prefix='zkpytoolkit_{}_'.format(identifier), suffix='.dat')
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(data)
+                weakref.finalize(self, _remove, path)
+                self._data_files[identifier] = path
+            return path
+
+    def __repr__(self):
+        return "Circuit(name={!r}, constraints_count={})".format(self.name, self.constraints_count)
@@ -1,11 +1,22 @@
+import array
 import inspect
+import struct
+import sys
 import textwrap
+from mpyc import finfields
 from zkpytoolkit.types import Public, Private, Array, field
 from dataclasses import fields
 from typing import get_type_hints
 
+# Annotations may refer to the field of another ZKP instance, so any prime field
+# type is accepted as field; the modulus is always the one of the instance. The
+# module-level field is None until a text input is prepared, and must not match
+# missing annotations.
+def _is_field_type(arg_type):
+    return (field is not None and arg_type == field) or (isinstance(arg_type, type) and issubclass(arg_type, finfields.PrimeFieldElement))
+
 def contains_field_recursive(arg_type):
-    if arg_type == field:
+    if _is_field_type(arg_type):
         return True
     elif getattr(arg_type, "__origin__", None) in {Private, Public}:
         inner_type = arg_type.__args__[0]
@@ -21,8 +32,8 @@ def parse_argument_value(value, arg_type, prefix=''):
         inner_type = arg_type.__args__[0]
         return parse_argument_value(value, inner_type, f'{prefix}')
     elif arg_type == int:
-        return f'({prefix} #x{value:08x})'
-    elif arg_type == field:
+        return f'({prefix} #x{value & 0xFFFFFFFF:08x})'
+    elif _is_field_type(arg_type):
         return f'({prefix} #f{value})'
     elif arg_type == bool:
         return f'({prefix} true)' if value else f'({prefix} false)'
@@ -114,6 +125,95 @@ def prepare_verifier_inputs(argument_names, argument_types, return_type, modulus
 
     return lisp_code
 
+# Structured inputs: instead of a Lisp text, each argument is passed to the
+# bindings as a tuple (name, kind, shape, data), where data holds the flattened
+# elements in row-major order as little-endian integers of 32 bytes for field,
+# 4 bytes for int and 1 byte for bool. Field elements are reduced modulo the
+# modulus, and negative ints are encoded in two's complement, like the 32-bit
+# ints of the circuit. One-dimensional arrays may also be given as bytes or
+# array.array, which are encoded without going through each element.
+_BUFFER_TYPES = (bytes, bytearray, memoryview, array.array)
+_BOOL_TABLE = bytes([0] + [1] * 255)
+
+def _argument_kind(arg_type):
+    while getattr(arg_type, "__origin__", None) in {Private, Public}:
+        arg_type = arg_type.__args__[0]
+    depth = 0
+    while getattr(arg_type, "__origin__", None) == Array:
+        arg_type = arg_type.__args__[0]
+        depth += 1
+    if _is_field_type(arg_type):
+        return 'field', depth
+    elif arg_type == int:
+        return 'int', depth
+    elif arg_type == bool:
+        return 'bool', depth
+    raise TypeError("Unsupported argument type: {}".format(arg_type))
+
+def _int_data(values):
+    if isinstance(values, array.array) and values.typecode in 'iIlL' and values.itemsize == 4 and sys.byteorder == 'little':
+        return values.tobytes()
+    values = values.tolist() if isinstance(values, (memoryview, array.array)) else [int(v) for v in values]
+    if values and (min(values) < -2**31 or max(values) >= 2**32):
+        raise ValueError("int arguments must lie in the range [-2**31, 2**32).")
+    return struct.pack('<{}I'.format(len(values)), *(v & 0xFFFFFFFF for v in values))
+
+def _bool_data(values):
+    if isinstance(values, (bytes, bytearray)):
+        return bytes(values).translate(_BOOL_TABLE)
+    return bytes(1 if v else 0 for v in values)
+
+def flatten_argument_value(value, arg_type, modulus):
+    kind, depth = _argument_kind(arg_type)
+
+    if depth == 1 and isinstance(value, _BUFFER_TYPES):
+        shape = [len(value)]
+        leaves = value
+    else:
+        shape = []
+        leaves = [value]
+        for _ in range(depth):
+            length = len(leaves[0]) if leaves else 0
+            if any(len(row) != length for row in leaves):
+                raise ValueError("Array arguments must be rectangular.")
+            shape.append(length)
+            leaves = [element for row in leaves for element in row]
+
+    if kind == 'field':
+        data = b''.join((int(v) % modulus).to_bytes(32, 'little') for v in leaves)
+    elif kind == 'int':
+        data = _int_data(leaves)
+    else:
+        data = _bool_data(leaves)
+    return kind, shape, data
+
+def prepare_prover_buffers(argument_names, argument_types, modulus, field_tmp, *args, **kwargs):
+    argument_values = args + tuple(kwargs.values())
+
+    arguments = [
+        (name, *flatten_argument_value(value, argument_types.get(name, None), modulus))
+        for name, value in zip(argument_names, argument_values)
+    ]
+
+    # The modulus is only needed if any argument type is field
+    contains_field = any(contains_field_recursive(arg_type) for arg_type in argument_types.values())
+    return (str(modulus) if contains_field else None, arguments)
+
+def prepare_verifier_buffers(argument_names, argument_types, return_type, modulus, return_value, field_tmp, *args, **kwargs):
+    argument_values = args + tuple(kwargs.values())
+
+    # First flatten all public values, then the return value
+    arguments = []
+    for name, value in zip(argument_names, argument_values):
+        arg_type = argument_types.get(name, None)
+        if getattr(arg_type, "__origin__", None) == Private:
+            continue
+        arguments.append((name, *flatten_argument_value(value, arg_type, modulus)))
+    arguments.append(('return', *flatten_argument_value(return_value, return_type, modulus)))
+
+    contains_field = any(contains_field_recursive(arg_type) for arg_type in argument_types.values())
+    return (str(modulus) if contains_field else None, arguments)
+
 def get_variable_name(obj, global_vars, local_vars):
     if global_vars is None:
         global_vars = globals()
@@ -150,7 +250,7 @@ def represent_type_annotation(class_type, field_tmp):
         return 'int'
     elif class_type == bool:
         return 'bool'
-    elif class_type == field_tmp:
+    elif class_type == field_tmp or _is_field_type(class_type):
         return 'field'
     else:
         return f'{class_type.__name__}'
@@ -0,0 +1,97 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from zkpytoolkit.circuit import Circuit
+from zkpytoolkit.hazmat.bindings import compiler, backend
+
+# Pool of prover processes for one ZKP instance. The constraints, prover data
+# and CRS of the given functions are sent to every worker once, where the CRS
+# is parsed into a resident key. Each worker writes the prover data to a file
+# of its own, which ZKPyC reads it from, and removes it when it exits. In file
+# mode the workers get the paths of the constraints, prover data and key files
+# instead, which they read directly and share through the page cache. Jobs
+# then only carry the function name and the flattened arguments
+# (flattened in the calling process, so that neither functions nor field types
+# have to be pickled), and each worker generates the witness and proof fully
+# in memory.
+_worker = {}
+
+
+def _init_worker(modulus, module, backend_name, circuits):
+    compiler.init(modulus)
+    _worker['modulus'] = modulus
+    _worker['module'] = module
+    _worker['backend'] = backend_name
+    _worker['circuits'] = {}
+    for f_name, (constraints, prover_data, crs, trusted) in circuits.items():
+        key = None if crs is None else backend.load_key(crs, backend_name, trusted)
+        circuit = None
+        if isinstance(prover_data, bytes):
+            # Kept for the life of the worker, together with its data file
+            circuit = Circuit(f_name, None, None, constraints, prover_data, None)
+        _worker['circuits'][f_name] = (constraints, prover_data, key, circuit)
+
+
+def _prove_job(f_name, inputs):
+    constraints, prover_data, key, circuit = _worker['circuits'][f_name]
+    if circuit is not None:
+        prover_data = circuit.data_file('prover')
+    header, witness = compiler.setup_proof_in_memory(f_name, inputs, prover_data, _worker['module'], _worker['modulus'])
+    if key is not None:
+        return backend.prove_with_key(header, witness, constraints, key)
+    return backend.prove_in_memory(header, witness, constraints, None, _worker['backend'])
+
+
+class ProverPool:
+    def __init__(self, zkp, funcs, processes=None, mp_context=None):
+        self.zkp = zkp
+        self.funcs = {func.__name__: func for func in funcs}
+
+        circuits = {}
+        for f_name, func in self.funcs.items():
+            if zkp.in_memory:
+                # The data file of the circuit goes away with it, so the
+                # workers are sent the prover data itself
+                circuit = zkp.get_circuit(func)
+                constraints, prover_data = circuit.constraints, circuit.prover_data
+            else:
+                constraints, prover_data = zkp._compiled_data(func, 'prover')
+            # Only Groth16 proves with a key, the other backends need no CRS
+            crs = zkp.get_crs(func, return_path=not zkp.in_memory) if zkp.backend == 'groth16' else None
+            circuits[f_name] = (constraints, prover_data, crs, zkp._is_trusted(func, None))
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn') if mp_context is None else mp_context,
+            initializer=_init_worker,
+            initargs=(str(zkp.modulus), zkp.module, zkp.backend, circuits),
+        )
+
+    def _get_func(self, func):
+        f_name = func if isinstance(func, str) else func.__name__
+        try:
+            return self.funcs[f_name]
+        except KeyError:
+            raise ValueError("The function {} has not been loaded into the pool.".format(f_name)) from None
+
+    def submit(self, func, *args, **kwargs):
+        # Returns a future resolving to the proof bytes
+        func = self._get_func(func)
+        inputs = self.zkp._prover_inputs(func, *args, **kwargs)
+        return self.executor.submit(_prove_job, func.__name__, inputs)
+
+    def prove(self, func, *args, **kwargs):
+        return self.submit(func, *args, **kwargs).result()
+
+    def map(self, func, args_list):
+        # Proofs are returned in input order
+        futures = [self.submit(func, *args) for args in args_list]
+        return [future.result() for future in futures]
+
+    def close(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
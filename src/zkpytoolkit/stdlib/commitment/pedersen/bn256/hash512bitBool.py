@@ -1,4 +1,5 @@
 from zkpytoolkit.types import Array, field # zk_ignore
+from zkpytoolkit.stdlib import native # zk_ignore
 from zkpytoolkit.stdlib.utils.multiplexer.lookup3bitSigned import sel3s
 from zkpytoolkit.stdlib.utils.multiplexer.lookup2bit import lookup as sel2
 from zkpytoolkit.stdlib.ecc.edwardsAdd import add
@@ -19,4 +20,6 @@ def pedersen_no_compress(inputs: Array[bool, 512], generator: Array[Array[Array[
         cy = sel2([e[3*i], e[3*i + 1]], [generator[i][0][1], generator[i][1][1], generator[i][2][1], generator[i][3][1]])
         a = add(a, [cx, cy], BABYJUBJUB_PARAMS)
 
-    return a
\ No newline at end of file
+    return a
+
+pedersen_no_compress = native.gadget(pedersen_no_compress, native.pedersen_point(field, BABYJUBJUB_PARAMS)) # zk_ignore
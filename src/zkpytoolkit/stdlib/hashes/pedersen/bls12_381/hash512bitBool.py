@@ -1,4 +1,5 @@
 from zkpytoolkit.types import Array, field # zk_ignore
+from zkpytoolkit.stdlib import native # zk_ignore
 from zkpytoolkit.stdlib.utils.multiplexer.lookup3bitSigned import sel3s
 from zkpytoolkit.stdlib.utils.multiplexer.lookup2bit import lookup as sel2
 from zkpytoolkit.stdlib.ecc.edwardsAdd import add
@@ -21,4 +22,6 @@ def pedersen(inputs: Array[bool, 512]) -> Array[bool, 256]:
         cy = sel2([e[3*i], e[3*i + 1]], [G_table[i][0][1], G_table[i][1][1], G_table[i][2][1], G_table[i][3][1]])
         a = add(a, [cx, cy], JUBJUB_PARAMS)
 
-    return edwardsCompress(a)
\ No newline at end of file
+    return edwardsCompress(a)
+
+pedersen = native.gadget(pedersen, native.pedersen_hash(field, G_table, JUBJUB_PARAMS)) # zk_ignore
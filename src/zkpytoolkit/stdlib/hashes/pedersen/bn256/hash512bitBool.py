@@ -1,4 +1,5 @@
 from zkpytoolkit.types import Array, field # zk_ignore
+from zkpytoolkit.stdlib import native # zk_ignore
 from zkpytoolkit.stdlib.utils.multiplexer.lookup3bitSigned import sel3s
 from zkpytoolkit.stdlib.utils.multiplexer.lookup2bit import lookup as sel2
 from zkpytoolkit.stdlib.ecc.edwardsAdd import add
@@ -22,3 +23,5 @@ def pedersen(inputs: Array[bool, 512]) -> Array[bool, 256]:
         a = add(a, [cx, cy], BABYJUBJUB_PARAMS)
 
     return edwardsCompress(a)
+
+pedersen = native.gadget(pedersen, native.pedersen_hash(field, G_table, BABYJUBJUB_PARAMS)) # zk_ignore
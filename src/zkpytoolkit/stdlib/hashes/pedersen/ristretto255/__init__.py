@@ -0,0 +1,4 @@
+from zkpytoolkit.stdlib.native.tables import install_tables # zk_ignore
+
+# Python loads the generator tables from their packed files, see native.tables
+install_tables(__name__ + '.generators', {'G_table': (171, 4, 2), 'H_table': (171, 4, 2)}) # zk_ignore
@@ -0,0 +1,4 @@
+from zkpytoolkit.stdlib.native.tables import install_tables # zk_ignore
+
+# Python loads the constants from their packed files, see native.tables
+install_tables(__name__ + '.constants', {'POSEIDON_C': (6, 497), 'POSEIDON_M': (6, 7, 7)}) # zk_ignore
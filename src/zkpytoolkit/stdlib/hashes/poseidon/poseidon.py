@@ -1,6 +1,7 @@
 # https://eprint.iacr.org/2019/458.pdf
 
 from zkpytoolkit.types import Array, field # zk_ignore
+from zkpytoolkit.stdlib import native # zk_ignore
 from .constants import POSEIDON_C, POSEIDON_M
 
 def ark(state: Array[field, 7], c: Array[field, 497], it: int) -> Array[field, 7]:
@@ -53,4 +54,6 @@ def poseidon(inputs: Array[field, 6]) -> field:
         state = sbox(state, f, p, r)
         state = mix(state, m)
 
-    return state[0]
\ No newline at end of file
+    return state[0]
+
+poseidon = native.gadget(poseidon, native.poseidon(field, POSEIDON_C, POSEIDON_M)) # zk_ignore
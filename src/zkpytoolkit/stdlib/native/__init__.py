@@ -0,0 +1,131 @@
+import functools
+import gmpy2
+from zkpytoolkit.stdlib.native import edwards
+from zkpytoolkit.stdlib.native.tables import PackedTable
+
+# Native evaluation of the heavier stdlib gadgets. When they are called from
+# Python instead of being compiled, they run on gmpy2 integers modulo the
+# field rather than on field objects, with the same results. Each gadget is
+# rebound to a wrapper at the end of its module, on a line that the compiler
+# ignores, so that compiled circuits are still built from the source as
+# written. Set `enabled` to False to evaluate the gadgets as written.
+enabled = True
+
+
+def gadget(func, impl):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        return impl(*args, **kwargs)
+    return wrapper
+
+
+def _int(value, p):
+    return gmpy2.mpz(int(value) % p)
+
+
+def _row(table, i):
+    # Packed tables hand out their rows as integers, without field elements
+    return table.row(i) if isinstance(table, PackedTable) else table[i]
+
+
+def _bits(n, size):
+    # The last `size` bits of n in big endian order, like EMBED.unpack
+    return [bool(n >> i & 1) for i in reversed(range(size))]
+
+
+# Integer versions of lookup2bit.lookup and lookup3bitSigned.sel3s
+def _sel2(b0, b1, c0, c1, c2, c3, p):
+    alpha = (c1 - c0 + (b1 if (c3 - c2 - c1 + c0) % p else 0)) % p
+    return ((b0 if alpha else 0) + c0 - (b1 if (c0 - c2) % p else 0)) % p
+
+
+def _sel3s(b0, b1, b2, c0, c1, c2, c3, p):
+    alpha = _sel2(b0, b1, c0, c1, c2, c3, p)
+    return (alpha - 2 * (b2 if alpha else 0)) % p
+
+
+class _Curve:
+    # The parameters and generator tables of one Edwards curve as integers,
+    # converted on first use
+    def __init__(self, field, params):
+        self.p = field.modulus
+        self.params = params
+        self.tables = {}
+
+    @functools.cached_property
+    def coefficients(self):
+        return _int(self.params.EDWARDS_A, self.p), _int(self.params.EDWARDS_D, self.p)
+
+    @functools.cached_property
+    def infinity(self):
+        return tuple(_int(value, self.p) for value in self.params.INFINITY)
+
+    def table(self, generator):
+        # Keyed by identity, the tables are module constants
+        entry = self.tables.get(id(generator))
+        if entry is None:
+            windows = [[(_int(u, self.p), _int(v, self.p)) for u, v in _row(generator, i)] for i in range(len(generator))]
+            entry = self.tables[id(generator)] = (generator, windows)
+        return entry[1]
+
+    def pedersen(self, inputs, generator):
+        # The loop of hash512bitBool.pedersen and pedersen_no_compress, which
+        # accumulates in extended coordinates and normalizes once at the end
+        p = self.p
+        a, d = self.coefficients
+        e = [int(bit) for bit in inputs] + [0]
+        acc = edwards.from_affine(*self.infinity, p)
+        for i, window in enumerate(self.table(generator)[:171]):
+            b0, b1, b2 = e[3*i], e[3*i + 1], e[3*i + 2]
+            (u0, v0), (u1, v1), (u2, v2), (u3, v3) = window
+            cx = _sel3s(b0, b1, b2, u0, u1, u2, u3, p)
+            cy = _sel2(b0, b1, v0, v1, v2, v3, p)
+            acc = edwards.add_affine(acc, cx, cy, a, d, p)
+        return edwards.to_affine(acc, p)
+
+
+def pedersen_hash(field, generator, params):
+    # hash512bitBool.pedersen of the hashes, with edwardsCompress
+    curve = _Curve(field, params)
+
+    def impl(inputs):
+        u, v = curve.pedersen(inputs, generator)
+        y_bits = [False, *_bits(v, 255)]
+        y_bits[0] = bool(u & 1)
+        return y_bits
+    return impl
+
+
+def pedersen_point(field, params):
+    # hash512bitBool.pedersen_no_compress of the commitments
+    curve = _Curve(field, params)
+
+    def impl(inputs, generator):
+        u, v = curve.pedersen(inputs, generator)
+        return [field(int(u)), field(int(v))]
+    return impl
+
+
+def poseidon(field, constants_c, constants_m):
+    # poseidon.poseidon, for 6 inputs
+    p = field.modulus
+    f = 8
+    rounds_p = 63
+    constants = []
+
+    def impl(inputs):
+        if not constants:
+            constants.append([_int(value, p) for value in _row(constants_c, 7 - 2)])
+            constants.append([[_int(value, p) for value in row] for row in _row(constants_m, 7 - 2)])
+        c, m = constants
+
+        state = [gmpy2.mpz(0)] + [_int(inputs[i - 1], p) for i in range(1, 7)]
+        for r in range(0, f + rounds_p):
+            state = [(state[i] + c[r*7 + i]) % p for i in range(7)]
+            full = (r < f/2) or (r >= f/2 + rounds_p)
+            state = [gmpy2.powmod(x, 5, p) if i == 0 or full else x for i, x in enumerate(state)]
+            state = [sum(state[j] * m[i][j] for j in range(7)) % p for i in range(7)]
+        return field(int(state[0]))
+    return impl
@@ -0,0 +1,34 @@
+import gmpy2
+
+# Twisted Edwards arithmetic for the native evaluation of the gadgets, in the
+# extended coordinates (X:Y:T:Z) of "Twisted Edwards Curves Revisited" by
+# Hisil et al., where x = X/Z, y = Y/Z and x*y = T/Z. Additions need no
+# inversion, so a chain of them is normalized with a single one at the end.
+# The circuits keep using the affine ecc.edwardsAdd.add.
+
+
+def from_affine(u, v, p):
+    return (u, v, u * v % p, gmpy2.mpz(1))
+
+
+def to_affine(pt, p):
+    x, y, _, z = pt
+    z_inv = gmpy2.invert(z, p)
+    return x * z_inv % p, y * z_inv % p
+
+
+def add_affine(pt, u, v, a, d, p):
+    # Adds the affine point (u, v) to pt, with the unified formulas of
+    # add-2008-hwcd for Z2 = 1. Like edwardsAdd.add, it fails where one of the
+    # denominators of the affine formulas vanishes: those are F/Z1 and G/Z1.
+    x1, y1, t1, z1 = pt
+    A = x1 * u % p
+    B = y1 * v % p
+    C = d * t1 % p * u % p * v % p
+    E = ((x1 + y1) * (u + v) - A - B) % p
+    F = (z1 - C) % p
+    G = (z1 + C) % p
+    H = (B - a * A) % p
+    if not F or not G:
+        raise ZeroDivisionError("division by zero")
+    return (E * F % p, G * H % p, E * H % p, F * G % p)
@@ -0,0 +1,93 @@
+import math
+import os
+import sys
+import types
+import zkpytoolkit.types
+
+# The constant tables of the stdlib, such as the Pedersen generators and the
+# Poseidon constants, packed next to their module by extra/pack_tables.py as
+# little-endian 32-byte integers in row-major order. Python loads the tables
+# from these files instead of executing the module, while the compiler still
+# reads the module. A table is only created when its module attribute is first
+# accessed, its file is only read on first use, and a row (the window of a
+# generator table, the arity of a Poseidon table) is only decoded when it is
+# used, and only turned into field elements when the gadgets as written
+# access it.
+_VALUE_SIZE = 32
+
+
+def _nest(values, shape):
+    if len(shape) == 1:
+        return values
+    size = len(values) // shape[0]
+    return [_nest(values[i:i + size], shape[1:]) for i in range(0, len(values), size)]
+
+
+def _to_field(row):
+    if isinstance(row, list):
+        return [_to_field(value) for value in row]
+    return zkpytoolkit.types.field(row)
+
+
+class PackedTable:
+    def __init__(self, path, shape):
+        self.path = path
+        self.shape = shape
+        self._data = None
+        self._rows = {}
+        self._field_rows = {}
+
+    def row(self, i):
+        # Row i as nested lists of integers
+        i = range(len(self))[i]
+        row = self._rows.get(i)
+        if row is None:
+            if self._data is None:
+                with open(self.path, 'rb') as file:
+                    self._data = file.read()
+            size = math.prod(self.shape[1:]) * _VALUE_SIZE
+            data = self._data[i * size:(i + 1) * size]
+            values = [int.from_bytes(data[j:j + _VALUE_SIZE], 'little') for j in range(0, size, _VALUE_SIZE)]
+            row = self._rows[i] = _nest(values, self.shape[1:])
+        return row
+
+    def rows(self):
+        return [self.row(i) for i in range(len(self))]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        # Row i as field elements, like the table of the module
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = range(len(self))[i]
+        row = self._field_rows.get(i)
+        if row is None:
+            row = self._field_rows[i] = _to_field(self.row(i))
+        return row
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def install_tables(name, tables):
+    # Registers the module `name` before it can be imported, with a table for
+    # each of `tables`, which maps the attribute names to the shapes of the
+    # packed files {attribute}.bin next to the module
+    package, _, module_name = name.rpartition('.')
+    folder = os.path.dirname(sys.modules[package].__file__)
+    module = types.ModuleType(name)
+    module.__file__ = os.path.join(folder, module_name + '.py')
+
+    def __getattr__(attr):
+        # PEP 562, so that the tables are only created when first imported
+        if attr not in tables:
+            raise AttributeError("module {!r} has no attribute {!r}".format(name, attr))
+        table = PackedTable(os.path.join(folder, attr + '.bin'), tables[attr])
+        setattr(module, attr, table)
+        return table
+
+    module.__getattr__ = __getattr__
+    module.__dir__ = lambda: sorted({*module.__dict__, *tables})
+    sys.modules[name] = module
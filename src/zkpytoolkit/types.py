@@ -10,20 +10,21 @@ curve25519_scalar_field_modulus = 7237005577332262213973186563042994240857116359
 
 field = None
 
-def _set_modulus(value):
-    global field
+def _get_field(value):
     if value == "bn256" or value == bn256_scalar_field_modulus:
-        field = finfields.GF(bn256_scalar_field_modulus)
-        return field
+        return finfields.GF(bn256_scalar_field_modulus)
     elif value == "bls12_381" or value == bls12_381_scalar_field_modulus or value is None:
-        field = finfields.GF(bls12_381_scalar_field_modulus)
-        return field
+        return finfields.GF(bls12_381_scalar_field_modulus)
     elif value == "curve25519" or value == curve25519_scalar_field_modulus:
-        field = finfields.GF(curve25519_scalar_field_modulus)
-        return field
+        return finfields.GF(curve25519_scalar_field_modulus)
     else:
         raise ValueError("The only supported scalar fields are those of the following curves: bn256, bls12_381, curve25519.")
 
+def _set_modulus(value):
+    global field
+    field = _get_field(value)
+    return field
+
 class Public(Generic[T]):
     pass
 
@@ -1,31 +1,85 @@
+import inspect
+import multiprocessing
 import os
-from zkpytoolkit.types import _set_modulus
-from zkpytoolkit.input_gen import prepare_prover_inputs, prepare_verifier_inputs, process_includes, represent_object
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from zkpytoolkit.types import _get_field, _set_modulus
+from zkpytoolkit.input_gen import prepare_prover_buffers, prepare_verifier_buffers, process_includes, represent_object
+from zkpytoolkit.circuit import Circuit
+from zkpytoolkit.cache import CircuitCache
 from zkpytoolkit.hazmat.bindings import compiler, backend
 
+# The compiler front-end is configured for a single modulus per process, so
+# instances for any other modulus compile in a helper process of their own.
+_compiler_processes = {}
+_compiler_processes_lock = threading.Lock()
+
+def _init_compiler_process(modulus):
+    if not compiler.init(modulus):
+        raise RuntimeError("The compiler of this process is set up for another modulus.")
+
+def _compile_in_process(func_name, code, id, module, opt_level, passes):
+    return compiler.compile_in_memory(func_name, code, id, module, opt_level, passes)
+
+def _profile_in_process(func_name, code, id, module, opt_level, passes):
+    return compiler.profile(func_name, code, id, module, opt_level, passes)
+
+def _compiler_process(modulus):
+    with _compiler_processes_lock:
+        executor = _compiler_processes.get(modulus)
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_compiler_process,
+                initargs=(str(modulus),),
+            )
+            _compiler_processes[modulus] = executor
+        return executor
+
+def _write_atomic(path, data):
+    # Write next to the final location and rename into place, so that
+    # concurrent readers never see a partially written file
+    folder, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.{}_'.format(name), dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
 class ZKP:
-    _instance = None
+    # Set by the first instance, whose field is also the one exported by
+    # zkpytoolkit.types. Every instance carries its own modulus and field.
     modulus = None
     field = None # this is a temporary solution for type checking in externally called functions
 
-    def __new__(cls, modulus=None, id=0, backend=None, module='__main__'):
-        if cls._instance is None:
-            field = _set_modulus(modulus)
-            cls._instance = super(ZKP, cls).__new__(cls)
-            compiler.init(str(field.modulus))
-            cls.modulus = field.modulus
-            cls.field = field
-            cls.id = id
-            cls.backend = backend
-            cls.module = module
-        else:
-            raise RuntimeError("Only one instance of the ZKP class is allowed.")
-        return cls._instance
+    def __init__(self, modulus=None, id=0, backend=None, module='__main__', in_memory=False, cache_dir=None):
+        field = _get_field(modulus)
+        if ZKP.field is None:
+            ZKP.modulus = field.modulus
+            ZKP.field = _set_modulus(modulus)
+        self._native_compiler = compiler.init(str(field.modulus))
+        self.modulus = field.modulus
+        self.field = field
+        self.id = id
+        self.backend = backend
+        self.module = module
+        self.in_memory = in_memory
+        self.circuits = {}
+        self.keys = {}
+        self.verifying_keys = {}
+        # Functions whose current CRS was generated by this instance
+        self.generated_keys = set()
+        self.cache = None if cache_dir is None else CircuitCache(cache_dir)
 
-    def compile(self, func, includes=None, global_vars=None, local_vars=None):
-        # Get the function implementation and name
+    def _generate_code(self, func, includes=None, global_vars=None, local_vars=None):
+        # Get the function implementation
         func_impl = represent_object(func, current_module=self.module, is_entry_fct=True)
-        func_name = func.__name__
 
         # Get the processed objects
         if includes is None:
@@ -34,14 +88,85 @@ class ZKP:
             obj_impl = process_includes(includes, self.field, self.module, global_vars, local_vars)
 
         # Concatenate the function definition and processed objects
-        code = f"{obj_impl}{func_impl}"
+        return f"{obj_impl}{func_impl}"
+
+    def compile(self, func, includes=None, global_vars=None, local_vars=None, opt_level=2, passes=None):
+        # opt_level 1 leaves out the RAM passes, for circuits without arrays
+        # accessed at private indices, and 3 also reduces linearities further.
+        # An explicit list of pass names replaces the passes of the level.
+        func_name = func.__name__
+        code = self._generate_code(func, includes, global_vars, local_vars)
+        passes = None if passes is None else list(passes)
         # print(code)
-        return compiler.compile(func_name, code, self.id, self.module)
+        if self.cache is None and not self.in_memory and self._native_compiler:
+            return compiler.compile(func_name, code, self.id, self.module, opt_level, passes)
 
-    def prepare_proof(self, func, *args, **kwargs):
-        argument_names = func.__code__.co_varnames[:func.__code__.co_argcount]
+        compiled = self._compile_to_bytes(func_name, code, opt_level, passes)
+        if self.in_memory:
+            circuit = Circuit(func_name, *compiled)
+            self.circuits[func_name] = circuit
+            return circuit
+        return self._install_compiled(func_name, *compiled)
+
+    def _compile_in_memory(self, func_name, code, opt_level, passes):
+        if self._native_compiler:
+            return compiler.compile_in_memory(func_name, code, self.id, self.module, opt_level, passes)
+        executor = _compiler_process(self.modulus)
+        return executor.submit(_compile_in_process, func_name, code, self.id, self.module, opt_level, passes).result()
+
+    def profile(self, func, includes=None, global_vars=None, local_vars=None, opt_level=2, passes=None):
+        # Compile func once more, without storing anything, and report the size
+        # of its R1CS and the seconds spent in each stage of the compiler
+        code = self._generate_code(func, includes, global_vars, local_vars)
+        passes = None if passes is None else list(passes)
+        if self._native_compiler:
+            return compiler.profile(func.__name__, code, self.id, self.module, opt_level, passes)
+        executor = _compiler_process(self.modulus)
+        return executor.submit(_profile_in_process, func.__name__, code, self.id, self.module, opt_level, passes).result()
+
+    def _compile_to_bytes(self, func_name, code, opt_level, passes):
+        if self.cache is None:
+            return self._compile_in_memory(func_name, code, opt_level, passes)
+
+        # The key covers the generated source, the sources of the modules it
+        # imports and the optimizations, so a change in the function, any of
+        # its includes or the passes results in a miss
+        key = self.cache.key(func_name, code, self.modulus, self.module, (opt_level, passes))
+        compiled = self.cache.load(key)
+        if compiled is None:
+            compiled = self._compile_in_memory(func_name, code, opt_level, passes)
+            self.cache.store(key, *compiled)
+        return compiled
+
+    def _install_compiled(self, f_name, constraints_count, header, constraints, prover_data, verifier_data):
+        # Lay out the compiled circuit like compiler.compile does
+        zkif_folder = './cache_id_{}/zkif_export'.format(self.id)
+        data_folder = './cache_id_{}/zkp_data'.format(self.id)
+        os.makedirs(zkif_folder, exist_ok=True)
+        os.makedirs(data_folder, exist_ok=True)
+
+        files = {
+            zkif_folder + '/header_{}_{}.zkif'.format(self.module, f_name): header,
+            zkif_folder + '/constraints_{}_{}.zkif'.format(self.module, f_name): constraints,
+            data_folder + '/{}_{}_prover_data.dat'.format(self.module, f_name): prover_data,
+            data_folder + '/{}_{}_verifier_data.dat'.format(self.module, f_name): verifier_data,
+        }
+        for path, data in files.items():
+            _write_atomic(path, data)
+        return constraints_count
+
+    def get_circuit(self, func):
+        try:
+            return self.circuits[func.__name__]
+        except KeyError:
+            raise ValueError("The function {} has not been compiled in memory.".format(func.__name__)) from None
+
+    def _prover_inputs(self, func, *args, **kwargs):
+        # Gadgets with a native evaluation are wrapped, their arguments are those of the original
+        code = inspect.unwrap(func).__code__
+        argument_names = code.co_varnames[:code.co_argcount]
         argument_types = func.__annotations__
-        lisp_code = prepare_prover_inputs(
+        return prepare_prover_buffers(
             argument_names,
             argument_types,
             self.modulus,
@@ -50,17 +175,39 @@ class ZKP:
             **kwargs
         )
 
-        return compiler.setup_proof(func.__name__, lisp_code, self.id, self.module)
+    def _compiled_data(self, func, identifier):
+        # Returns the constraints and the path of the prover or verifier data,
+        # without going through the fixed per-function statement files in file
+        # mode. There, the constraints are passed by path as well, for the
+        # bindings to map the file instead of copying it into Python bytes.
+        if self.in_memory:
+            circuit = self.get_circuit(func)
+            return circuit.constraints, circuit.data_file(identifier)
 
-    def prepare_verification(self, func, *args, return_value=None, **kwargs):
+        f_name = func.__name__
+        constraints_file = 'cache_id_{}/zkif_export/constraints_{}_{}.zkif'.format(self.id, self.module, f_name)
+        data_file = 'cache_id_{}/zkp_data/{}_{}_{}_data.dat'.format(self.id, self.module, f_name, identifier)
+        return constraints_file, data_file
+
+    def prepare_proof(self, func, *args, **kwargs):
+        inputs = self._prover_inputs(func, *args, **kwargs)
+
+        if self.in_memory:
+            circuit = self.get_circuit(func)
+            return compiler.setup_proof_in_memory(func.__name__, inputs, circuit.data_file('prover'), self.module, str(self.modulus))
+        return compiler.setup_proof(func.__name__, inputs, self.id, self.module, str(self.modulus))
+
+    def _verifier_inputs(self, func, *args, return_value=None, **kwargs):
         if return_value is None:
             raise ValueError("Missing return value for verification.")
 
-        argument_names = func.__code__.co_varnames[:func.__code__.co_argcount]
+        # Gadgets with a native evaluation are wrapped, their arguments are those of the original
+        code = inspect.unwrap(func).__code__
+        argument_names = code.co_varnames[:code.co_argcount]
         argument_types = func.__annotations__
         return_type = argument_types.get('return', None)
 
-        lisp_code = prepare_verifier_inputs(
+        return prepare_verifier_buffers(
             argument_names,
             argument_types,
             return_type,
@@ -71,43 +218,168 @@ class ZKP:
             **kwargs,
         )
 
-        return compiler.setup_verification(func.__name__, lisp_code, self.id, self.module)
+    def prepare_verification(self, func, *args, return_value=None, **kwargs):
+        inputs = self._verifier_inputs(func, *args, return_value=return_value, **kwargs)
+
+        if self.in_memory:
+            circuit = self.get_circuit(func)
+            return compiler.setup_verification_in_memory(func.__name__, inputs, circuit.data_file('verifier'), self.module, str(self.modulus))
+        return compiler.setup_verification(func.__name__, inputs, self.id, self.module, str(self.modulus))
+
+    def generate_crs(self, func, return_path=False):
+        if self.in_memory:
+            if return_path:
+                raise ValueError("A CRS path can only be returned in file mode.")
+            circuit = self.get_circuit(func)
+            circuit.crs = backend.setup_in_memory(circuit.header, circuit.constraints, self.backend)
+            circuit.vk = None
+            self._drop_keys(func)
+            self.generated_keys.add(func.__name__)
+            return circuit.crs
 
-    def generate_crs(self, func):
         f_name = func.__name__
         header_file = 'cache_id_{}/zkif_export/header_{}_{}.zkif'.format(self.id, self.module, f_name)
         constraints_file = 'cache_id_{}/zkif_export/constraints_{}_{}.zkif'.format(self.id, self.module, f_name)
 
-        with open(header_file, 'rb') as file:
-            circuit = file.read()
-        with open(constraints_file, 'rb') as file:
-            constraints = file.read()
+        # The zkif files are passed by path and memory-mapped by the bindings
+        backend.setup(header_file, constraints_file, f_name, self.id, self.module, self.backend)
 
-        backend.setup(circuit, constraints, f_name, self.id, self.module, self.backend)
+        # finally return the bytestring of the crs, or its path to leave the
+        # key on disk
+        self._drop_keys(func)
+        self.generated_keys.add(func.__name__)
+        return self.get_crs(func, return_path)
 
-        # finally return the bytestring of the crs
-        crs_file = 'cache_id_{}/zkp_params_and_proofs/{}_{}_key.dat'.format(self.id, self.module, f_name)
-        with open(crs_file, 'rb') as file:
-            crs = file.read()
-        return crs
+    def _drop_keys(self, func):
+        # Keys loaded from a previous CRS must not be reused
+        self.keys.pop(func.__name__, None)
+        self.verifying_keys.pop(func.__name__, None)
+        self.generated_keys.discard(func.__name__)
+
+    def _is_trusted(self, func, trusted):
+        # Unless told otherwise, only the keys generated by this instance are
+        # loaded without checking that their points lie in the prime order
+        # subgroups, and any key that was passed in is checked
+        if trusted is None:
+            return func.__name__ in self.generated_keys
+        return trusted
 
     def store_crs(self, func, crs_bytes):
+        self._drop_keys(func)
+        if self.in_memory:
+            circuit = self.get_circuit(func)
+            circuit.crs = crs_bytes
+            circuit.vk = None
+            return
+
         f_name = func.__name__
         crs_folder = './cache_id_{}/zkp_params_and_proofs'.format(self.id)
         crs_file = crs_folder + '/{}_{}_key.dat'.format(self.module, f_name)
-        if not os.path.exists(crs_folder):
-            os.makedirs(crs_folder)
-        with open(crs_file, 'wb') as file:
-            file.write(crs_bytes)
+        os.makedirs(crs_folder, exist_ok=True)
+        if self.backend == 'groth16':
+            # Keep the verifying key of the new CRS next to it, like setup does
+            self.store_vk(func, backend.export_verifying_key(crs_bytes))
+        _write_atomic(crs_file, crs_bytes)
+
+    def load_crs(self, func, crs_bytes=None, trusted=None):
+        # Parse the CRS once and keep the key resident for all subsequent
+        # proofs and verifications of func
+        if crs_bytes is not None:
+            self.store_crs(func, crs_bytes)
+        else:
+            # In file mode the key file is memory-mapped by the bindings
+            crs_bytes = self.get_crs(func, return_path=not self.in_memory)
+
+        key = backend.load_key(crs_bytes, self.backend, self._is_trusted(func, trusted))
+        self.keys[func.__name__] = key
+        return key
+
+    def get_crs(self, func, return_path=False):
+        if self.in_memory:
+            if return_path:
+                raise ValueError("A CRS path can only be returned in file mode.")
+            crs_bytes = self.get_circuit(func).crs
+            if crs_bytes is None:
+                raise ValueError("No CRS has been generated or stored for {}.".format(func.__name__))
+            return crs_bytes
+
+        crs_file = 'cache_id_{}/zkp_params_and_proofs/{}_{}_key.dat'.format(self.id, self.module, func.__name__)
+        if return_path:
+            return crs_file
+        with open(crs_file, 'rb') as file:
+            return file.read()
+
+    def get_vk(self, func, return_path=False):
+        # The Groth16 verifying key on its own, which is all a verifier needs
+        if self.in_memory:
+            if return_path:
+                raise ValueError("A verifying key path can only be returned in file mode.")
+            circuit = self.get_circuit(func)
+            if circuit.vk is None:
+                circuit.vk = backend.export_verifying_key(self.get_crs(func))
+            return circuit.vk
+
+        vk_file = 'cache_id_{}/zkp_params_and_proofs/{}_{}_vk.dat'.format(self.id, self.module, func.__name__)
+        if return_path:
+            return vk_file
+        with open(vk_file, 'rb') as file:
+            return file.read()
+
+    def store_vk(self, func, vk_bytes):
+        self.verifying_keys.pop(func.__name__, None)
+        self.generated_keys.discard(func.__name__)
+        if self.in_memory:
+            self.get_circuit(func).vk = vk_bytes
+            return
+
+        f_name = func.__name__
+        vk_folder = './cache_id_{}/zkp_params_and_proofs'.format(self.id)
+        vk_file = vk_folder + '/{}_{}_vk.dat'.format(self.module, f_name)
+        os.makedirs(vk_folder, exist_ok=True)
+        _write_atomic(vk_file, vk_bytes)
+
+    def load_vk(self, func, vk_bytes=None, trusted=None):
+        # Like load_crs, but only parses and prepares the verifying key
+        if vk_bytes is not None:
+            self.store_vk(func, vk_bytes)
+        else:
+            vk_bytes = self.get_vk(func, return_path=not self.in_memory)
+
+        key = backend.load_verifying_key(vk_bytes, self.backend, self._is_trusted(func, trusted))
+        self.verifying_keys[func.__name__] = key
+        return key
+
+    def get_key(self, func):
+        # Only Groth16 has a proving key, the other backends return None
+        if self.backend != 'groth16':
+            return None
+        key = self.keys.get(func.__name__)
+        if key is None:
+            key = self.load_crs(func)
+        return key
+
+    def get_verifying_key(self, func):
+        # A proving key that is already loaded also verifies, otherwise only
+        # the verifying key is loaded
+        if self.backend != 'groth16':
+            return None
+        key = self.keys.get(func.__name__)
+        if key is None:
+            key = self.verifying_keys.get(func.__name__)
+        if key is None:
+            key = self.load_vk(func)
+        return key
 
     def store_proof(self, func, proof_bytes):
+        if self.in_memory:
+            self.get_circuit(func).proof = proof_bytes
+            return
+
         f_name = func.__name__
         proof_folder = './cache_id_{}/zkp_params_and_proofs'.format(self.id)
         proof_file = proof_folder + '/{}_{}_proof.dat'.format(self.module, f_name)
-        if not os.path.exists(proof_folder):
-            os.makedirs(proof_folder)
-        with open(proof_file, 'wb') as file:
-            file.write(proof_bytes)
+        os.makedirs(proof_folder, exist_ok=True)
+        _write_atomic(proof_file, proof_bytes)
 
     def run_prover(self, func):
         f_name = func.__name__
@@ -115,45 +387,117 @@ class ZKP:
         witness_file = 'cache_id_{}/zkif_export/witness_{}_{}.zkif'.format(self.id, self.module, f_name)
         constraints_file = 'cache_id_{}/zkif_export/constraints_{}_{}.zkif'.format(self.id, self.module, f_name)
 
-        with open(header_file, 'rb') as file:
-            circuit = file.read()
-        with open(witness_file, 'rb') as file:
-            witness = file.read()
-        with open(constraints_file, 'rb') as file:
-            constraints = file.read()
-
-        backend.prove(circuit, witness, constraints, f_name, self.id, self.module, self.backend)
+        key = self.get_key(func)
+        if key is not None:
+            self.store_proof(func, backend.prove_with_key(header_file, witness_file, constraints_file, key))
+            return
+        backend.prove(header_file, witness_file, constraints_file, f_name, self.id, self.module, self.backend, self._is_trusted(func, None))
 
     def run_verifier(self, func):
         f_name = func.__name__
         header_file = 'cache_id_{}/zkif_export/header_{}_{}.zkif'.format(self.id, self.module, f_name)
         constraints_file = 'cache_id_{}/zkif_export/constraints_{}_{}.zkif'.format(self.id, self.module, f_name)
 
-        with open(header_file, 'rb') as file:
-            circuit = file.read()
-        with open(constraints_file, 'rb') as file:
-            constraints = file.read()
+        key = self.get_verifying_key(func)
+        if key is not None:
+            proof_file = 'cache_id_{}/zkp_params_and_proofs/{}_{}_proof.dat'.format(self.id, self.module, f_name)
+            with open(proof_file, 'rb') as file:
+                proof = file.read()
+            return backend.verify_with_key(header_file, constraints_file, proof, key)
+        return backend.verify(header_file, constraints_file, f_name, self.id, self.module, self.backend, self._is_trusted(func, None))
 
-        return backend.verify(circuit, constraints, f_name, self.id, self.module, self.backend)
+    def check_witness(self, func, *args, **kwargs):
+        # Generate the witness and evaluate the constraints on it, without
+        # proving, to reject bad inputs before paying for a proof
+        constraints, prover_data = self._compiled_data(func, 'prover')
+        inputs = self._prover_inputs(func, *args, **kwargs)
+        header, witness = compiler.setup_proof_in_memory(func.__name__, inputs, prover_data, self.module, str(self.modulus))
+
+        failed = backend.check_witness(header, witness, constraints)
+        if failed is not None:
+            raise ValueError("The witness of {} does not satisfy constraint {}.".format(func.__name__, failed))
+        return True
 
     def prove(self, func, *args, **kwargs):
-        # first we obtain correct circuit and witness zkif files from python inputs
-        # then we run the backend's prover
-        self.prepare_proof(func, *args, **kwargs)
-        self.run_prover(func)
+        # The statements and proof of each invocation are kept in memory, also in
+        # file mode, so that concurrent proofs of the same function never share
+        # files. Only the finished proof is stored under cache_id_{id}.
+        constraints, prover_data = self._compiled_data(func, 'prover')
+        inputs = self._prover_inputs(func, *args, **kwargs)
+        header, witness = compiler.setup_proof_in_memory(func.__name__, inputs, prover_data, self.module, str(self.modulus))
 
-        # finally return the bytestring of proof
-        f_name = func.__name__
-        proof_file = 'cache_id_{}/zkp_params_and_proofs/{}_{}_proof.dat'.format(self.id, self.module, f_name)
-        with open(proof_file, 'rb') as file:
-            proof = file.read()
+        key = self.get_key(func)
+        if key is not None:
+            proof = backend.prove_with_key(header, witness, constraints, key)
+        else:
+            crs = self.get_circuit(func).crs if self.in_memory else None
+            proof = backend.prove_in_memory(header, witness, constraints, crs, self.backend, self._is_trusted(func, None))
+
+        if not self.in_memory:
+            self.store_proof(func, proof)
         return proof
 
-    def verify(self, func, *args, return_value=None, **kwargs):
-        # first we obtain correct circuit zkif files from python inputs
-        # then we run the backend's verifier
-        self.prepare_verification(func, *args, return_value=return_value, **kwargs)
-        return self.run_verifier(func)
+    def prove_batch(self, func, args_list, max_workers=None):
+        # The constraints, prover data and key are loaded once and shared by
+        # all jobs, and the proofs are spread over a pool of worker threads
+        constraints, prover_data = self._compiled_data(func, 'prover')
+        key = self.get_key(func)
+
+        # Witness generation releases the GIL, so it is spread over threads as well
+        def setup_proof(args):
+            inputs = self._prover_inputs(func, *args)
+            return compiler.setup_proof_in_memory(func.__name__, inputs, prover_data, self.module, str(self.modulus))
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            statements = list(executor.map(setup_proof, args_list))
+        headers = [header for header, _ in statements]
+        witnesses = [witness for _, witness in statements]
+
+        return backend.prove_batch(headers, witnesses, constraints, key, self.backend, max_workers)
+
+    def verify(self, func, *args, return_value=None, proof=None, **kwargs):
+        # Like prove, each invocation keeps its statement in memory
+        if self.in_memory:
+            crs = self.get_circuit(func).crs
+            proof = self.get_circuit(func).proof if proof is None else proof
+            if proof is None:
+                raise ValueError("Missing proof for verification.")
+        else:
+            crs = None
+            if proof is None:
+                proof_file = 'cache_id_{}/zkp_params_and_proofs/{}_{}_proof.dat'.format(self.id, self.module, func.__name__)
+                with open(proof_file, 'rb') as file:
+                    proof = file.read()
+
+        constraints, verifier_data = self._compiled_data(func, 'verifier')
+        inputs = self._verifier_inputs(func, *args, return_value=return_value, **kwargs)
+        header = compiler.setup_verification_in_memory(func.__name__, inputs, verifier_data, self.module, str(self.modulus))
+
+        key = self.get_verifying_key(func)
+        if key is not None:
+            return backend.verify_with_key(header, constraints, proof, key)
+        return backend.verify_in_memory(header, constraints, proof, crs, self.backend, self._is_trusted(func, None))
+
+    def verify_batch(self, func, items):
+        # Each item is a tuple (public_args, return_value, proof_bytes), and the
+        # result is the validity of each proof in input order
+        constraints, verifier_data = self._compiled_data(func, 'verifier')
+        key = self.get_verifying_key(func)
+
+        headers = []
+        proofs = []
+        for args, return_value, proof in items:
+            inputs = self._verifier_inputs(func, *args, return_value=return_value)
+            headers.append(compiler.setup_verification_in_memory(func.__name__, inputs, verifier_data, self.module, str(self.modulus)))
+            proofs.append(proof)
+
+        return backend.verify_batch(headers, constraints, proofs, key, self.backend)
 
     def cleanup(self):
+        self.keys.clear()
+        self.verifying_keys.clear()
+        self.generated_keys.clear()
+        if self.in_memory:
+            self.circuits.clear()
+            return
         compiler.cleanup(self.id)
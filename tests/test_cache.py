@@ -0,0 +1,95 @@
+import importlib
+import os
+import sys
+import pytest
+
+from zkpytoolkit import cache
+from zkpytoolkit.cache import CircuitCache
+
+ENTRY = (3, b'header', b'constraints', b'prover data', b'verifier data')
+CODE = "def f(a: int) -> int:\n    return a\n"
+
+
+@pytest.fixture
+def circuit_cache(tmp_path):
+    return CircuitCache(str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def helper_module(tmp_path, monkeypatch):
+    # A module on the path that generated code can import
+    folder = tmp_path / "modules"
+    folder.mkdir()
+    monkeypatch.syspath_prepend(str(folder))
+    path = folder / "cache_helper.py"
+    path.write_text("def g(a: int) -> int:\n    return a\n")
+    importlib.invalidate_caches()
+    yield path
+    sys.modules.pop("cache_helper", None)
+
+
+def test_store_and_load(circuit_cache):
+    key = circuit_cache.key("f", CODE, 7, "__main__")
+    assert circuit_cache.load(key) is None
+    circuit_cache.store(key, *ENTRY)
+    assert circuit_cache.load(key) == ENTRY
+
+    # Storing again replaces the entry
+    circuit_cache.store(key, 4, *ENTRY[1:])
+    assert circuit_cache.load(key) == (4, *ENTRY[1:])
+
+
+def test_incomplete_entry_is_a_miss(circuit_cache):
+    key = circuit_cache.key("f", CODE, 7, "__main__")
+    circuit_cache.store(key, *ENTRY)
+    os.remove(os.path.join(circuit_cache.path, key, "verifier_data.dat"))
+    assert circuit_cache.load(key) is None
+
+
+def test_clear(circuit_cache):
+    key = circuit_cache.key("f", CODE, 7, "__main__")
+    circuit_cache.store(key, *ENTRY)
+    circuit_cache.clear()
+    assert circuit_cache.load(key) is None
+
+
+def test_key_covers_the_inputs(circuit_cache, monkeypatch):
+    key = circuit_cache.key("f", CODE, 7, "__main__", (2, None))
+    assert key == circuit_cache.key("f", CODE, 7, "__main__", (2, None))
+    other_keys = [
+        circuit_cache.key("g", CODE, 7, "__main__", (2, None)),
+        circuit_cache.key("f", CODE + "\n", 7, "__main__", (2, None)),
+        circuit_cache.key("f", CODE, 11, "__main__", (2, None)),
+        circuit_cache.key("f", CODE, 7, "other", (2, None)),
+        circuit_cache.key("f", CODE, 7, "__main__", (1, None)),
+        circuit_cache.key("f", CODE, 7, "__main__", (2, ["Flatten"])),
+    ]
+    monkeypatch.setattr(cache, "__version__", "0.0.0")
+    other_keys.append(circuit_cache.key("f", CODE, 7, "__main__", (2, None)))
+    assert len({key, *other_keys}) == len(other_keys) + 1
+
+
+def test_key_covers_imported_modules(circuit_cache, helper_module):
+    code = "from cache_helper import g\n" + CODE
+    key = circuit_cache.key("f", code, 7, "__main__")
+    assert key != circuit_cache.key("f", CODE, 7, "__main__")
+    assert key == circuit_cache.key("f", code, 7, "__main__")
+
+    helper_module.write_text("def g(a: int) -> int:\n    return a + 1\n")
+    assert key != circuit_cache.key("f", code, 7, "__main__")
+
+
+def test_key_covers_modules_imported_in_turn(circuit_cache, helper_module):
+    nested = helper_module.parent / "cache_nested.py"
+    nested.write_text("def h(a: int) -> int:\n    return a\n")
+    helper_module.write_text("from cache_nested import h\n")
+    code = "import cache_helper\n" + CODE
+    key = circuit_cache.key("f", code, 7, "__main__")
+
+    nested.write_text("def h(a: int) -> int:\n    return a + 1\n")
+    assert key != circuit_cache.key("f", code, 7, "__main__")
+
+
+def test_included_sources_skip_the_toolkit_and_python(helper_module):
+    code = "import os\nfrom zkpytoolkit.types import field\nimport cache_helper\n" + CODE
+    assert [name for name, _ in cache.included_sources(code)] == ["cache_helper"]
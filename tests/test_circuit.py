@@ -0,0 +1,37 @@
+import gc
+import os
+
+from zkpytoolkit.circuit import Circuit
+
+
+def make_circuit():
+    return Circuit("f", 3, b'header', b'constraints', b'prover data', b'verifier data')
+
+
+def test_data_file_is_written_once():
+    circuit = make_circuit()
+    prover_file = circuit.data_file('prover')
+    verifier_file = circuit.data_file('verifier')
+    assert prover_file != verifier_file
+    assert circuit.data_file('prover') == prover_file
+
+    with open(prover_file, 'rb') as file:
+        assert file.read() == b'prover data'
+    with open(verifier_file, 'rb') as file:
+        assert file.read() == b'verifier data'
+
+
+def test_data_files_are_removed_with_the_circuit():
+    circuit = make_circuit()
+    paths = [circuit.data_file('prover'), circuit.data_file('verifier')]
+    del circuit
+    gc.collect()
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_data_file_may_be_removed_first():
+    circuit = make_circuit()
+    os.remove(circuit.data_file('prover'))
+    # The finalizer must not fail on a file that is already gone
+    del circuit
+    gc.collect()
@@ -0,0 +1,80 @@
+import array
+import pytest
+
+from mpyc import finfields
+from zkpytoolkit.input_gen import flatten_argument_value, prepare_prover_buffers, prepare_verifier_buffers
+from zkpytoolkit.types import Array, Private, Public
+
+MODULUS = 2**255 - 19
+F = finfields.GF(MODULUS)
+
+
+def ints(*values):
+    return b''.join(value.to_bytes(4, 'little') for value in values)
+
+
+def test_int_encoding():
+    assert flatten_argument_value(5, int, MODULUS) == ('int', [], ints(5))
+    assert flatten_argument_value(2**32 - 1, int, MODULUS) == ('int', [], ints(2**32 - 1))
+
+
+def test_negative_int_encoding():
+    # Two's complement, like the 32-bit ints of the circuit
+    assert flatten_argument_value(-1, int, MODULUS) == ('int', [], ints(2**32 - 1))
+    assert flatten_argument_value([-2**31, -2], Array[int, 2], MODULUS) == ('int', [2], ints(2**31, 2**32 - 2))
+
+
+@pytest.mark.parametrize("value", [2**32, -2**31 - 1, 2**100])
+def test_int_out_of_range(value):
+    with pytest.raises(ValueError):
+        flatten_argument_value(value, int, MODULUS)
+    with pytest.raises(ValueError):
+        flatten_argument_value([0, value], Array[int, 2], MODULUS)
+
+
+def test_field_encoding():
+    for value in (F(3), 3, -1, MODULUS + 3, 2**300):
+        kind, shape, data = flatten_argument_value(value, F, MODULUS)
+        assert (kind, shape) == ('field', [])
+        assert data == (int(value) % MODULUS).to_bytes(32, 'little')
+
+
+def test_bool_encoding():
+    assert flatten_argument_value([True, False, 2], Array[bool, 3], MODULUS) == ('bool', [3], b'\x01\x00\x01')
+
+
+def test_nested_arrays():
+    value = [[1, 2, 3], [4, 5, 6]]
+    assert flatten_argument_value(value, Private[Array[Array[int, 3], 2]], MODULUS) == ('int', [2, 3], ints(1, 2, 3, 4, 5, 6))
+    with pytest.raises(ValueError):
+        flatten_argument_value([[1, 2], [3]], Array[Array[int, 2], 2], MODULUS)
+
+
+@pytest.mark.parametrize("value", [
+    array.array('i', [1, -1, 7]),
+    array.array('I', [1, 2**32 - 1, 7]),
+    array.array('q', [1, -1, 7]),
+    bytes([1, 255, 7]),
+    memoryview(bytearray([1, 255, 7])),
+])
+def test_int_buffers(value):
+    expected = flatten_argument_value(list(value), Array[int, 3], MODULUS)
+    assert flatten_argument_value(value, Array[int, 3], MODULUS) == expected
+
+
+def test_bool_buffers():
+    assert flatten_argument_value(b'\x00\x01\x02', Array[bool, 3], MODULUS) == ('bool', [3], b'\x00\x01\x01')
+    assert flatten_argument_value(bytearray(b'\x05'), Array[bool, 1], MODULUS) == ('bool', [1], b'\x01')
+
+
+def test_statement_buffers():
+    types = {'a': Private[F], 'b': Public[Array[int, 2]]}
+    modulus, arguments = prepare_prover_buffers(['a', 'b'], types, MODULUS, F, F(1), [2, -3])
+    assert modulus == str(MODULUS)
+    assert [name for name, *_ in arguments] == ['a', 'b']
+    assert arguments[1] == ('b', 'int', [2], ints(2, 2**32 - 3))
+
+    # The verifier only gets the public arguments and the return value
+    modulus, arguments = prepare_verifier_buffers(['a', 'b'], types, bool, MODULUS, True, F, F(1), [2, -3])
+    assert [name for name, *_ in arguments] == ['b', 'return']
+    assert arguments[1] == ('return', 'bool', [], b'\x01')
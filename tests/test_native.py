@@ -0,0 +1,60 @@
+import importlib
+import random
+import pytest
+
+pytest.importorskip("zkpytoolkit.hazmat.bindings._rust")
+
+from zkpytoolkit import ZKP
+
+# The stdlib gadgets evaluate over the field of the first ZKP instance
+ZKP(modulus="bls12_381")
+
+from zkpytoolkit.types import field
+from zkpytoolkit.stdlib import native
+
+CURVES = ["bls12_381", "bn256", "ristretto255"]
+
+
+def evaluate(monkeypatch, gadget, *args):
+    # The results of the native evaluation and of the gadget as written
+    results = []
+    for enabled in (True, False):
+        monkeypatch.setattr(native, "enabled", enabled)
+        results.append(gadget(*args))
+    return results
+
+
+def int_inputs(rng):
+    return [[0] * 16] + [[rng.getrandbits(32) for _ in range(16)] for _ in range(2)]
+
+
+@pytest.mark.parametrize("curve", CURVES)
+def test_pedersen_hash(monkeypatch, curve):
+    module = importlib.import_module(f"zkpytoolkit.stdlib.hashes.pedersen.{curve}.hash512bit")
+    rng = random.Random(curve)
+    for inputs in int_inputs(rng):
+        native_result, result = evaluate(monkeypatch, module.hash, inputs)
+        assert native_result == result
+
+
+@pytest.mark.parametrize("curve", CURVES)
+def test_pedersen_commitment(monkeypatch, curve):
+    module = importlib.import_module(f"zkpytoolkit.stdlib.commitment.pedersen.{curve}.commit")
+    rng = random.Random(curve)
+    for x, r in zip(int_inputs(rng), int_inputs(rng)):
+        native_result, result = evaluate(monkeypatch, module.commit_int, x, r)
+        assert native_result == result
+
+    x = field(rng.getrandbits(250))
+    r = [field(rng.getrandbits(250)), field(rng.getrandbits(250))]
+    native_result, result = evaluate(monkeypatch, module.commit_field, x, r)
+    assert native_result == result
+
+
+def test_poseidon(monkeypatch):
+    module = importlib.import_module("zkpytoolkit.stdlib.hashes.poseidon.hash")
+    rng = random.Random("poseidon")
+    for inputs in ([field(0)] * 6, [field(rng.getrandbits(250)) for _ in range(6)]):
+        native_result, result = evaluate(monkeypatch, module.hash, inputs)
+        assert native_result == result
+        assert type(native_result) is type(result)
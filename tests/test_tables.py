@@ -0,0 +1,96 @@
+import importlib
+import sys
+import pytest
+
+from zkpytoolkit.stdlib.native.tables import PackedTable, install_tables
+
+STDLIB_TABLES = [
+    ("zkpytoolkit.stdlib.hashes.poseidon.constants", "POSEIDON_C"),
+    ("zkpytoolkit.stdlib.hashes.poseidon.constants", "POSEIDON_M"),
+    ("zkpytoolkit.stdlib.hashes.pedersen.bls12_381.generators", "G_table"),
+    ("zkpytoolkit.stdlib.hashes.pedersen.bn256.generators", "H_table"),
+    ("zkpytoolkit.stdlib.hashes.pedersen.ristretto255.generators", "G_table"),
+]
+
+
+def pack(path, values):
+    with open(path, 'wb') as file:
+        for value in values:
+            file.write(value.to_bytes(32, 'little'))
+
+
+class _Array:
+    def __class_getitem__(cls, item):
+        return None
+
+
+def source_tables(module):
+    # The tables of a stdlib module as written, like extra/pack_tables.py reads them
+    with open(module.__file__, 'r') as file:
+        source = ''.join(line for line in file if 'zk_ignore' not in line)
+    namespace = {'field': int, 'Array': _Array}
+    exec(source, namespace)
+    return namespace
+
+
+@pytest.fixture
+def table_package(tmp_path, monkeypatch):
+    # A package with one packed table, (3, 2, 2) values 0, 1, ..., 11
+    folder = tmp_path / "table_package"
+    folder.mkdir()
+    (folder / "__init__.py").write_text("")
+    pack(folder / "T.bin", range(12))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    importlib.invalidate_caches()
+    yield importlib.import_module("table_package")
+    for name in ("table_package", "table_package.consts"):
+        sys.modules.pop(name, None)
+
+
+def test_rows(tmp_path):
+    pack(tmp_path / "T.bin", [0, 1, 2**255, 3, 4, 5])
+    table = PackedTable(str(tmp_path / "T.bin"), (3, 2))
+    assert len(table) == 3
+    assert table.row(1) == [2**255, 3]
+    assert table.row(-1) == [4, 5]
+    assert table.rows() == [[0, 1], [2**255, 3], [4, 5]]
+    with pytest.raises(IndexError):
+        table.row(3)
+
+
+def test_nested_rows(tmp_path):
+    pack(tmp_path / "T.bin", range(12))
+    table = PackedTable(str(tmp_path / "T.bin"), (3, 2, 2))
+    assert table.row(2) == [[8, 9], [10, 11]]
+
+
+def test_file_is_read_on_first_use(tmp_path):
+    table = PackedTable(str(tmp_path / "missing.bin"), (1, 1))
+    with pytest.raises(FileNotFoundError):
+        table.row(0)
+
+
+def test_install_tables(table_package):
+    install_tables("table_package.consts", {"T": (3, 2, 2)})
+    module = sys.modules["table_package.consts"]
+    assert "T" not in module.__dict__
+    assert "T" in dir(module)
+
+    from table_package.consts import T
+    assert isinstance(T, PackedTable)
+    assert T.row(0) == [[0, 1], [2, 3]]
+    # The table is created once and then stays on the module
+    assert module.T is T
+
+    with pytest.raises(AttributeError):
+        module.U
+    with pytest.raises(ImportError):
+        from table_package.consts import U
+
+
+@pytest.mark.parametrize("module_name, name", STDLIB_TABLES)
+def test_stdlib_tables_match_their_module(module_name, name):
+    module = importlib.import_module(module_name)
+    table = getattr(module, name)
+    assert isinstance(table, PackedTable)
+    assert table.rows() == source_tables(module)[name]
@@ -0,0 +1,122 @@
+import gc
+import os
+import pytest
+
+pytest.importorskip("zkpytoolkit.hazmat.bindings._rust")
+
+from zkpytoolkit import ZKP, ProverPool
+from zkpytoolkit.circuit import Circuit
+
+# The field of the first ZKP instance is the one of the annotations
+ZKP(modulus="bls12_381")
+
+from zkpytoolkit.types import Array, Private, Public, field
+
+
+def dot(a: Private[Array[field, 3]], b: Public[Array[field, 3]]) -> field:
+    acc: field = field(0)
+    for i in range(0, 3):
+        acc = acc + a[i] * b[i]
+    return acc
+
+
+def select(a: Private[Array[int, 4]], i: Private[int]) -> int:
+    return a[i]
+
+
+def args():
+    return [field(1), field(2), field(3)], [field(4), field(5), field(6)]
+
+
+@pytest.fixture
+def zkp():
+    zkp = ZKP(modulus="bls12_381", backend="groth16", in_memory=True)
+    yield zkp
+    zkp.cleanup()
+
+
+def prove_and_verify(zkp, func, a, b, return_value):
+    zkp.generate_crs(func)
+    proof = zkp.prove(func, a, b)
+    return zkp.verify(func, b, return_value=return_value, proof=proof)
+
+
+@pytest.mark.parametrize("options", [
+    {"opt_level": 1},
+    {"opt_level": 2},
+    {"opt_level": 3},
+    {"passes": ["ScalarizeVars", "Flatten", "ConstantFold", "Tuple", "Obliv", "Tuple", "LinearScan"]},
+])
+def test_optimizations(zkp, options):
+    zkp.compile(dot, **options)
+    a, b = args()
+    assert prove_and_verify(zkp, dot, a, b, field(32))
+    assert not prove_and_verify(zkp, dot, a, b, field(33))
+
+
+def test_ram_passes(zkp):
+    zkp.compile(select, opt_level=2)
+    zkp.generate_crs(select)
+    proof = zkp.prove(select, [5, 6, 7, 8], 2)
+    assert zkp.verify(select, return_value=7, proof=proof)
+
+
+@pytest.mark.parametrize("options", [
+    {"opt_level": 0},
+    {"opt_level": 4},
+    {"passes": ["NoSuchPass"]},
+])
+def test_invalid_optimizations(zkp, options):
+    with pytest.raises(ValueError):
+        zkp.compile(dot, **options)
+
+
+def test_circuit_lifecycle(zkp):
+    circuit = zkp.compile(dot)
+    assert isinstance(circuit, Circuit)
+    assert zkp.get_circuit(dot) is circuit
+    assert circuit.constraints_count > 0
+
+    a, b = args()
+    assert prove_and_verify(zkp, dot, a, b, field(32))
+    data_files = [circuit.data_file('prover'), circuit.data_file('verifier')]
+    assert all(os.path.exists(path) for path in data_files)
+
+    # A second proof reuses the data files of the circuit
+    proof = zkp.prove(dot, a, b)
+    assert [circuit.data_file('prover'), circuit.data_file('verifier')] == data_files
+    assert zkp.verify(dot, b, return_value=field(32), proof=proof)
+
+    # The data files go away with the circuit
+    del circuit
+    zkp.cleanup()
+    gc.collect()
+    assert not any(os.path.exists(path) for path in data_files)
+    with pytest.raises(ValueError):
+        zkp.get_circuit(dot)
+
+
+def test_prover_pool(zkp):
+    zkp.compile(dot)
+    crs = zkp.generate_crs(dot)
+    a, b = args()
+    with ProverPool(zkp, [dot], processes=2) as pool:
+        # The workers keep their own copy of the prover data when the
+        # circuit goes away
+        zkp.cleanup()
+        gc.collect()
+        proofs = pool.map(dot, [(a, b), (b, a)])
+        proofs.append(pool.prove("dot", a, b))
+
+    zkp.compile(dot)
+    zkp.store_crs(dot, crs)
+    for proof, public in zip(proofs, [b, a, b]):
+        assert zkp.verify(dot, public, return_value=field(32), proof=proof)
+
+
+def test_prover_pool_unknown_function(zkp):
+    zkp.compile(dot)
+    zkp.generate_crs(dot)
+    with ProverPool(zkp, [dot], processes=1) as pool:
+        with pytest.raises(ValueError):
+            pool.prove(select, [1, 2, 3, 4], 0)